@@ -0,0 +1,36 @@
+"""local tariff goods nomenclature mirror
+
+Revision ID: 0004_tariff_mirror
+Revises: 0003_invoice_validation
+Create Date: 2026-02-10
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_tariff_mirror"
+down_revision = "0003_invoice_validation"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tariff_commodities",
+        sa.Column("sid", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("code", sa.String(length=10), nullable=False),
+        sa.Column("producline_suffix", sa.String(length=2), nullable=False),
+        sa.Column("description", sa.String(length=2048), nullable=True),
+        sa.Column("parent_sid", sa.Integer(), nullable=True),
+        sa.Column("number_indents", sa.Integer(), nullable=False),
+        sa.Column("leaf", sa.Boolean(), nullable=False),
+        sa.Column("heading", sa.String(length=4), nullable=False),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_tariff_commodities_code", "tariff_commodities", ["code"])
+    op.create_index("ix_tariff_commodities_heading", "tariff_commodities", ["heading"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tariff_commodities_heading", table_name="tariff_commodities")
+    op.drop_index("ix_tariff_commodities_code", table_name="tariff_commodities")
+    op.drop_table("tariff_commodities")
@@ -0,0 +1,37 @@
+"""persisted normalized currency totals
+
+Revision ID: 0005_normalized_currency
+Revises: 0004_tariff_mirror
+Create Date: 2026-02-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_normalized_currency"
+down_revision = "0004_tariff_mirror"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("invoices", sa.Column("normalized_currency", sa.String(length=10), nullable=True))
+    op.add_column("invoices", sa.Column("normalized_total_value", sa.Numeric(18, 6), nullable=True))
+    op.add_column("invoices", sa.Column("normalized_freight_cost", sa.Numeric(18, 6), nullable=True))
+    op.add_column("invoices", sa.Column("normalized_insurance_cost", sa.Numeric(18, 6), nullable=True))
+    op.add_column("invoices", sa.Column("normalization_fx_rate", sa.Numeric(18, 10), nullable=True))
+    op.add_column("invoices", sa.Column("normalization_rate_date", sa.String(length=10), nullable=True))
+    op.add_column("invoices", sa.Column("normalization_fingerprint", sa.String(length=64), nullable=True))
+    op.add_column("invoices", sa.Column("normalized_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("invoice_line_items", sa.Column("normalized_line_total", sa.Numeric(18, 6), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("invoice_line_items", "normalized_line_total")
+    op.drop_column("invoices", "normalized_at")
+    op.drop_column("invoices", "normalization_fingerprint")
+    op.drop_column("invoices", "normalization_rate_date")
+    op.drop_column("invoices", "normalization_fx_rate")
+    op.drop_column("invoices", "normalized_insurance_cost")
+    op.drop_column("invoices", "normalized_freight_cost")
+    op.drop_column("invoices", "normalized_total_value")
+    op.drop_column("invoices", "normalized_currency")
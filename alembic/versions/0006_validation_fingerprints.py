@@ -0,0 +1,23 @@
+"""validation input fingerprints
+
+Revision ID: 0006_validation_fingerprints
+Revises: 0005_normalized_currency
+Create Date: 2026-02-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_validation_fingerprints"
+down_revision = "0005_normalized_currency"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("invoice_line_items", sa.Column("validation_fingerprint", sa.String(length=64), nullable=True))
+    op.add_column("validation_tasks", sa.Column("input_fingerprint", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("validation_tasks", "input_fingerprint")
+    op.drop_column("invoice_line_items", "validation_fingerprint")
@@ -0,0 +1,22 @@
+"""validation task work-queue indexes
+
+Revision ID: 0007_validation_task_queue
+Revises: 0006_validation_fingerprints
+Create Date: 2026-02-20
+"""
+from alembic import op
+
+revision = "0007_validation_task_queue"
+down_revision = "0006_validation_fingerprints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_validation_tasks_invoice_status_created", "validation_tasks", ["invoice_id", "status", "created_at"])
+    op.create_index("ix_validation_tasks_queue", "validation_tasks", ["status", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_validation_tasks_queue", table_name="validation_tasks")
+    op.drop_index("ix_validation_tasks_invoice_status_created", table_name="validation_tasks")
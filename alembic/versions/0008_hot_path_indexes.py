@@ -0,0 +1,34 @@
+"""composite indexes for list, validation and auth paths
+
+Revision ID: 0008_hot_path_indexes
+Revises: 0007_validation_task_queue
+Create Date: 2026-02-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_hot_path_indexes"
+down_revision = "0007_validation_task_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_invoices_user_created", "invoices", ["user_id", "created_at", "id"])
+    op.create_index("ix_draft_invoices_user_created", "draft_invoices", ["user_id", "created_at", "id"])
+    op.create_index("ix_invoice_line_items_invoice_sort", "invoice_line_items", ["invoice_id", "sort_order"])
+    op.create_index(
+        "ix_refresh_tokens_user_active",
+        "refresh_tokens",
+        ["user_id"],
+        postgresql_where=sa.text("revoked_at IS NULL"),
+    )
+    op.create_index("ix_team_memberships_user_id", "team_memberships", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_team_memberships_user_id", table_name="team_memberships")
+    op.drop_index("ix_refresh_tokens_user_active", table_name="refresh_tokens")
+    op.drop_index("ix_invoice_line_items_invoice_sort", table_name="invoice_line_items")
+    op.drop_index("ix_draft_invoices_user_created", table_name="draft_invoices")
+    op.drop_index("ix_invoices_user_created", table_name="invoices")
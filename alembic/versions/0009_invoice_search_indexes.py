@@ -0,0 +1,63 @@
+"""trigram and range indexes for invoice search
+
+Revision ID: 0009_invoice_search_indexes
+Revises: 0008_hot_path_indexes
+Create Date: 2026-03-01
+"""
+from alembic import op
+
+revision = "0009_invoice_search_indexes"
+down_revision = "0008_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index("ix_invoices_user_currency_created", "invoices", ["user_id", "currency", "created_at", "id"])
+    op.create_index("ix_invoices_user_invoice_date", "invoices", ["user_id", "invoice_date"])
+    op.create_index("ix_invoices_user_total_value", "invoices", ["user_id", "total_value"])
+    op.create_index(
+        "ix_invoices_supplier_name_trgm",
+        "invoices",
+        ["supplier_name"],
+        postgresql_using="gin",
+        postgresql_ops={"supplier_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_invoices_invoice_number_trgm",
+        "invoices",
+        ["invoice_number"],
+        postgresql_using="gin",
+        postgresql_ops={"invoice_number": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_invoice_line_items_description_trgm",
+        "invoice_line_items",
+        ["description"],
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_invoice_line_items_validated_hs_code",
+        "invoice_line_items",
+        ["validated_hs_code", "invoice_id"],
+        postgresql_ops={"validated_hs_code": "text_pattern_ops"},
+    )
+    op.create_index(
+        "ix_invoice_line_items_extracted_hs_code",
+        "invoice_line_items",
+        ["extracted_hs_code", "invoice_id"],
+        postgresql_ops={"extracted_hs_code": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoice_line_items_extracted_hs_code", table_name="invoice_line_items")
+    op.drop_index("ix_invoice_line_items_validated_hs_code", table_name="invoice_line_items")
+    op.drop_index("ix_invoice_line_items_description_trgm", table_name="invoice_line_items")
+    op.drop_index("ix_invoices_invoice_number_trgm", table_name="invoices")
+    op.drop_index("ix_invoices_supplier_name_trgm", table_name="invoices")
+    op.drop_index("ix_invoices_user_total_value", table_name="invoices")
+    op.drop_index("ix_invoices_user_invoice_date", table_name="invoices")
+    op.drop_index("ix_invoices_user_currency_created", table_name="invoices")
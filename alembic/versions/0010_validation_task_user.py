@@ -0,0 +1,35 @@
+"""denormalized user_id on validation tasks
+
+Revision ID: 0010_validation_task_user
+Revises: 0009_invoice_search_indexes
+Create Date: 2026-03-03
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0010_validation_task_user"
+down_revision = "0009_invoice_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("validation_tasks", sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.execute(
+        "UPDATE validation_tasks SET user_id = "
+        "(SELECT invoices.user_id FROM invoices WHERE invoices.id = validation_tasks.invoice_id)"
+    )
+    op.alter_column("validation_tasks", "user_id", nullable=False)
+    op.create_foreign_key(
+        "fk_validation_tasks_user_id", "validation_tasks", "users", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index(
+        "ix_validation_tasks_user_status_created", "validation_tasks", ["user_id", "status", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_validation_tasks_user_status_created", table_name="validation_tasks")
+    op.drop_constraint("fk_validation_tasks_user_id", "validation_tasks", type_="foreignkey")
+    op.drop_column("validation_tasks", "user_id")
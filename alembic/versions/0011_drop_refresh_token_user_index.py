@@ -0,0 +1,26 @@
+"""drop unused refresh token user index
+
+Revision ID: 0011_drop_refresh_token_user_index
+Revises: 0010_validation_task_user
+Create Date: 2026-03-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_drop_refresh_token_user_index"
+down_revision = "0010_validation_task_user"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_refresh_tokens_user_active", table_name="refresh_tokens")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_refresh_tokens_user_active",
+        "refresh_tokens",
+        ["user_id"],
+        postgresql_where=sa.text("revoked_at IS NULL"),
+    )
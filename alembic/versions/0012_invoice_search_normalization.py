@@ -0,0 +1,73 @@
+"""normalized currency, HS codes and parsed invoice dates for search
+
+Revision ID: 0012_invoice_search_normalization
+Revises: 0011_drop_refresh_token_user_index
+Create Date: 2026-03-07
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.normalize import parse_invoice_date
+
+revision = "0012_invoice_search_normalization"
+down_revision = "0011_drop_refresh_token_user_index"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _backfill_invoice_dates() -> None:
+    bind = op.get_bind()
+    invoices = sa.table(
+        "invoices",
+        sa.column("id", sa.Uuid()),
+        sa.column("invoice_date", sa.String()),
+        sa.column("invoice_date_value", sa.Date()),
+    )
+    last_id = None
+    while True:
+        stmt = (
+            sa.select(invoices.c.id, invoices.c.invoice_date)
+            .where(invoices.c.invoice_date.is_not(None))
+            .order_by(invoices.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            stmt = stmt.where(invoices.c.id > last_id)
+        rows = bind.execute(stmt).all()
+        if not rows:
+            return
+        updates = [
+            {"row_id": row.id, "parsed": parsed}
+            for row in rows
+            if (parsed := parse_invoice_date(row.invoice_date)) is not None
+        ]
+        if updates:
+            bind.execute(
+                invoices.update()
+                .where(invoices.c.id == sa.bindparam("row_id"))
+                .values(invoice_date_value=sa.bindparam("parsed")),
+                updates,
+            )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("invoices", sa.Column("invoice_date_value", sa.Date(), nullable=True))
+    _backfill_invoice_dates()
+    op.drop_index("ix_invoices_user_invoice_date", table_name="invoices")
+    op.create_index("ix_invoices_user_invoice_date_value", "invoices", ["user_id", "invoice_date_value"])
+
+    op.execute("UPDATE invoices SET currency = UPPER(TRIM(currency)) WHERE currency <> UPPER(TRIM(currency))")
+    for column in ("extracted_hs_code", "validated_hs_code"):
+        op.execute(
+            f"UPDATE invoice_line_items SET {column} = NULLIF(regexp_replace({column}, '[^0-9]', '', 'g'), '') "
+            f"WHERE {column} ~ '[^0-9]'"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_user_invoice_date_value", table_name="invoices")
+    op.create_index("ix_invoices_user_invoice_date", "invoices", ["user_id", "invoice_date"])
+    op.drop_column("invoices", "invoice_date_value")
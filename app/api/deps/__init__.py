@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,7 +8,9 @@ from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.security import hash_token
-from app.db.session import SessionLocal
+from app.core.principal_cache import principal_cache
+from app.db import session as sessions
+from app.db.session import SessionLocal, read_your_writes
 from app.models import User, RefreshToken
 from app.schemas.token import TokenPayload
 from app.models.enums import PlanEnum, AccountTypeEnum
@@ -27,19 +30,37 @@ async def get_current_user(
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         token_data = TokenPayload(**payload)
+        user_id = uuid.UUID(token_data.sub)
     except (JWTError, ValueError):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Could not validate credentials")
 
     if token_data.token_type != "access":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token type")
 
-    result = await db.execute(select(User).where(User.id == token_data.sub))
+    db.info["user_id"] = user_id
+    snapshot = principal_cache.get(str(user_id))
+    if snapshot is not None:
+        return await principal_cache.attach(db, snapshot)
+
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    principal_cache.put(str(user_id), user)
     return user
 
 
+async def get_read_db(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AsyncSession:
+    if sessions.ReplicaSessionLocal is None or read_your_writes.is_pinned(user.id):
+        yield db
+        return
+    async with sessions.ReplicaSessionLocal() as session:
+        yield session
+
+
 def require_plan(plan: PlanEnum):
     async def _checker(user: User = Depends(get_current_user)) -> User:
         if user.plan != plan:
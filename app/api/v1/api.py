@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, upgrade, forwarders, shipments, me, invoices, validation_tasks, tariff, fx
+from app.api.v1.endpoints import auth, upgrade, forwarders, shipments, me, invoices, validation_tasks, tariff, fx, health
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["auth"])
@@ -11,3 +11,4 @@ api_router.include_router(invoices.router, tags=["invoices"])
 api_router.include_router(validation_tasks.router, tags=["validation"])
 api_router.include_router(tariff.router, tags=["tariff"])
 api_router.include_router(fx.router, tags=["fx"])
+api_router.include_router(health.router, tags=["health"])
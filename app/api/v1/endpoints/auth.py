@@ -8,6 +8,7 @@ from sqlalchemy import select
 
 from app.api.deps import get_db, validate_refresh_token
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.core.security import create_access_token, create_refresh_token, hash_token
 from app.models import User, RefreshToken
 from app.models.enums import PlanEnum, AccountTypeEnum, StatusEnum, AuthProviderEnum
@@ -88,6 +89,7 @@ async def google_callback(code: str, state: str, db: AsyncSession = Depends(get_
         user.last_login_at = datetime.utcnow()
         user.auth_provider = AuthProviderEnum.google
         await db.commit()
+        principal_cache.invalidate(user.id)
 
     tokens = await _issue_tokens(db, user)
     if settings.FRONTEND_URL:
@@ -146,6 +148,7 @@ async def microsoft_callback(code: str, state: str, db: AsyncSession = Depends(g
         user.last_login_at = datetime.utcnow()
         user.auth_provider = AuthProviderEnum.microsoft
         await db.commit()
+        principal_cache.invalidate(user.id)
 
     tokens = await _issue_tokens(db, user)
     if settings.FRONTEND_URL:
@@ -5,6 +5,7 @@ from sqlalchemy import select
 
 from app.api.deps import get_db
 from app.core.security import hash_token
+from app.core.principal_cache import principal_cache
 from app.models import ForwarderInvite, User, Team, TeamMembership
 from app.models.enums import AccountTypeEnum, PlanEnum, InviteStatusEnum, StatusEnum, AuthProviderEnum
 from app.schemas.forwarder import ForwarderInviteAccept
@@ -73,4 +74,5 @@ async def accept_invite(payload: ForwarderInviteAccept, db: AsyncSession = Depen
     invite.status = InviteStatusEnum.accepted
     invite.accepted_at = datetime.utcnow()
     await db.commit()
+    principal_cache.invalidate(user.id)
     return {"status": "accepted"}
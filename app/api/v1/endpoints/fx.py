@@ -1,15 +1,21 @@
+from datetime import date
+
 from fastapi import APIRouter, HTTPException
 from app.core.config import settings
-from app.integrations.fx import FXClient
+from app.integrations.fx import FXClient, FXRateStore
 
 router = APIRouter(prefix="/fx")
 
 client = FXClient(settings.FX_API_BASE_URL, api_key=settings.FX_API_KEY)
+rate_store = FXRateStore(client, ttl_seconds=settings.FX_RATES_TTL_SECONDS)
 
 
 @router.get("/quote")
-async def fx_quote(base: str, quote: str, amount: float):
+async def fx_quote(base: str, quote: str, amount: float, on: date | None = None):
     if not base or not quote:
         raise HTTPException(status_code=400, detail="base and quote required")
-    data = await client.quote(base, quote, amount)
+    try:
+        data = await rate_store.quote(base, quote, amount, on_date=on)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="rate not found")
     return data
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_account_type
+from app.db.session import engine, pool_stats
+from app.models import User
+from app.models.enums import AccountTypeEnum
+
+router = APIRouter(prefix="/health")
+
+
+@router.get("/db")
+async def database_pool(user: User = Depends(require_account_type(AccountTypeEnum.admin))):
+    return pool_stats(engine)
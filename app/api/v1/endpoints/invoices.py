@@ -1,20 +1,26 @@
+import json
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_db, get_read_db
 from app.core.config import settings
-from app.models import UploadedDocument, DraftInvoice, Invoice, InvoiceLineItem, ValidationTask
+from app.core.pagination import CountCache, apply_keyset, split_page
+from app.core.responses import FastJSONResponse
+from app.models import UploadedDocument, DraftInvoice, Invoice, InvoiceLineItem
 from app.schemas.invoice import UploadResponse, ExtractResponse, DraftInvoiceOut, ConfirmInvoiceRequest, InvoiceOut, ListResponse
-from app.repositories.invoice_repo import InvoiceRepository
+from app.repositories.invoice_repo import InvoiceRepository, INVOICE_DETAIL_FIELDS, invoice_search_filters
 from app.integrations.tariff import TariffClient
-from app.integrations.fx import FXClient
-from app.services.invoice_validation_service import InvoiceValidationService
-from app.models import ValidationTask
+from app.integrations.tariff_mirror import tariff_mirror
+from app.integrations.fx import FXClient, FXRateStore
+from app.services.invoice_validation_service import InvoiceValidationService, normalized_totals, parse_invoice_date
+from app.services.duty_calculator import DutyCalculator
+from app.services.invoice_export import EXPORT_MEDIA_TYPES, available_formats, start_export
 from app.services.storage import LocalStorageBackend
 from app.services.invoice_extractor import (
     InvoiceExtractor,
@@ -24,7 +30,7 @@ from app.services.invoice_extractor import (
     detect_insurance_amount,
 )
 from app.services.llm_client import LLMClient
-from app.services.invoice_validator import validate_required_fields, reconcile_totals, validate_quantities
+from app.services.invoice_validator import rules
 from app.services.invoice_validation_service import InvoiceValidationService
 
 router = APIRouter(prefix="/invoices")
@@ -32,8 +38,10 @@ router = APIRouter(prefix="/invoices")
 storage = LocalStorageBackend(settings.UPLOAD_DIR)
 llm_client = LLMClient(settings.LLM_PROVIDER, model=settings.OPENAI_MODEL)
 extractor = InvoiceExtractor(llm_client)
-tariff_client = TariffClient(settings.TARIFF_API_BASE_URL)
+tariff_client = TariffClient(settings.TARIFF_API_BASE_URL, mirror=tariff_mirror)
 fx_client = FXClient(settings.FX_API_BASE_URL, api_key=settings.FX_API_KEY)
+fx_rates = FXRateStore(fx_client, ttl_seconds=settings.FX_RATES_TTL_SECONDS)
+list_counts = CountCache(ttl_seconds=settings.LIST_COUNT_CACHE_SECONDS)
 
 ALLOWED_TYPES = {"application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
 
@@ -101,6 +109,7 @@ async def extract_invoice(
     db.add(draft)
     await db.commit()
     await db.refresh(draft)
+    list_counts.invalidate(("drafts", user.id))
 
     text = ""
     if upload.content_type == "application/pdf":
@@ -138,7 +147,7 @@ async def extract_invoice(
 async def get_draft(
     draft_id: str,
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     try:
         draft_uuid = uuid.UUID(draft_id)
@@ -186,15 +195,13 @@ async def confirm_draft(
         return {"invoice_id": str(draft.confirmed_invoice_id)}
 
     payload_dict = payload.model_dump()
-    errors = []
-    errors.extend(validate_required_fields(payload_dict))
-    errors.extend(validate_quantities(payload_dict))
-    ok, msg = reconcile_totals(payload_dict)
-    if not ok and msg:
-        errors.append(msg)
-
-    if errors:
-        raise HTTPException(status_code=400, detail={"errors": errors})
+    findings = rules.compile("confirm").evaluate(payload_dict)
+    if findings:
+        detail: dict[str, Any] = {"errors": [finding["message"] for finding in findings]}
+        reconciliation = next((f["reconciliation"] for f in findings if "reconciliation" in f), None)
+        if reconciliation is not None:
+            detail["reconciliation"] = reconciliation
+        raise HTTPException(status_code=400, detail=detail)
 
     invoice = Invoice(
         user_id=user.id,
@@ -237,108 +244,192 @@ async def confirm_draft(
     draft.updated_at = datetime.utcnow()
 
     await db.commit()
+    list_counts.invalidate(("invoices", user.id))
     return {"invoice_id": str(invoice.id)}
 
 
-@router.get("/{invoice_id}", response_model=InvoiceOut)
-async def get_invoice(
-    invoice_id: str,
+def _invoice_filters(
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-):
+    supplier: str | None = Query(None, min_length=1, max_length=255),
+    number: str | None = Query(None, min_length=1, max_length=100),
+    currency: str | None = Query(None, min_length=3, max_length=10),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    min_total: float | None = Query(None),
+    max_total: float | None = Query(None),
+    hs_code: str | None = Query(None, max_length=14, pattern=r"^[ .]*[0-9][ .]*[0-9][0-9. ]*$"),
+    q: str | None = Query(None, min_length=3, max_length=255),
+) -> list:
     try:
-        invoice_uuid = uuid.UUID(invoice_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid invoice id")
-
-    result = await db.execute(select(Invoice).where(Invoice.id == invoice_uuid))
-    invoice = result.scalar_one_or_none()
-    if not invoice or invoice.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Invoice not found")
-
-    result = await db.execute(select(InvoiceLineItem).where(InvoiceLineItem.invoice_id == invoice.id).order_by(InvoiceLineItem.sort_order))
-    items = result.scalars().all()
-
-    return InvoiceOut(
-        id=invoice.id,
-        supplier_name=invoice.supplier_name,
-        invoice_number=invoice.invoice_number,
-        invoice_date=invoice.invoice_date,
-        due_date=invoice.due_date,
-        incoterm=invoice.incoterm,
-        currency=invoice.currency,
-        total_value=float(invoice.total_value) if invoice.total_value is not None else None,
-        freight_cost=float(invoice.freight_cost) if invoice.freight_cost is not None else None,
-        insurance_cost=float(invoice.insurance_cost) if invoice.insurance_cost is not None else None,
-        created_at=invoice.created_at,
-        items=items,
-    )
+        return invoice_search_filters(
+            user.id,
+            supplier=supplier,
+            number=number,
+            currency=currency,
+            date_from=date_from,
+            date_to=date_to,
+            min_total=min_total,
+            max_total=max_total,
+            hs_code=hs_code,
+            q=q,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
 
 @router.get("", response_model=ListResponse)
 async def list_invoices(
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    filters: list = Depends(_invoice_filters),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(False),
 ):
-    total_result = await db.execute(select(func.count()).select_from(Invoice).where(Invoice.user_id == user.id))
-    total = total_result.scalar_one()
-    result = await db.execute(
-        select(Invoice).where(Invoice.user_id == user.id).order_by(Invoice.created_at.desc()).limit(limit).offset(offset)
+    stmt = select(*(getattr(Invoice, field) for field in INVOICE_DETAIL_FIELDS)).where(*filters)
+    try:
+        rows, next_cursor = await _page(db, stmt, Invoice, limit, offset, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    total = None
+    if include_total:
+        count_stmt = select(func.count()).select_from(Invoice).where(*filters)
+        if len(filters) == 1:
+            total = await list_counts.get(("invoices", user.id), lambda: _count(db, count_stmt))
+        else:
+            total = await _count(db, count_stmt)
+    items = [{**row, "items": []} for row in rows]
+    return FastJSONResponse(
+        {"items": items, "total": total, "limit": limit, "offset": offset, "next_cursor": next_cursor}
     )
-    items = result.scalars().all()
-    payload_items = []
-    for invoice in items:
-        payload_items.append(
-            InvoiceOut(
-                id=invoice.id,
-                supplier_name=invoice.supplier_name,
-                invoice_number=invoice.invoice_number,
-                invoice_date=invoice.invoice_date,
-                due_date=invoice.due_date,
-                incoterm=invoice.incoterm,
-                currency=invoice.currency,
-                total_value=float(invoice.total_value) if invoice.total_value is not None else None,
-                freight_cost=float(invoice.freight_cost) if invoice.freight_cost is not None else None,
-                insurance_cost=float(invoice.insurance_cost) if invoice.insurance_cost is not None else None,
-                created_at=invoice.created_at,
-                items=[],
-            )
-        )
-    return ListResponse(items=payload_items, total=total, limit=limit, offset=offset)
+
+
+_payload = DraftInvoice.extracted_payload_json
+DRAFT_SUMMARY_COLUMNS = (
+    DraftInvoice.id,
+    DraftInvoice.upload_id,
+    DraftInvoice.status,
+    DraftInvoice.confidence,
+    _payload["supplier_name"].as_string().label("supplier_name"),
+    _payload["invoice_number"].as_string().label("invoice_number"),
+    _payload["currency"].as_string().label("currency"),
+    _payload["total_value"].as_string().label("total_value"),
+    DraftInvoice.confirmed_invoice_id,
+    DraftInvoice.created_at,
+    DraftInvoice.updated_at,
+)
+DRAFT_DETAIL_COLUMNS = {
+    "extracted_payload": DraftInvoice.extracted_payload_json.label("extracted_payload"),
+    "confirmed_payload": DraftInvoice.confirmed_payload_json.label("confirmed_payload"),
+    "warnings": DraftInvoice.warnings_json.label("warnings"),
+    "raw_text_excerpt": DraftInvoice.raw_text_excerpt,
+}
+
+
+def _draft_fields(fields: str | None) -> list[str]:
+    requested = [field.strip() for field in (fields or "").split(",") if field.strip()]
+    unknown = [field for field in requested if field not in DRAFT_DETAIL_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
+
+
+def _draft_summary(row) -> dict:
+    item = dict(row)
+    try:
+        item["total_value"] = float(item["total_value"]) if item["total_value"] not in (None, "") else None
+    except (TypeError, ValueError):
+        item["total_value"] = None
+    if "warnings" in item:
+        item["warnings"] = item["warnings"] or []
+    return item
 
 
 @router.get("/drafts", response_model=ListResponse)
 async def list_drafts(
     user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    include_total: bool = Query(False),
+    fields: str | None = Query(None, description="Comma-separated heavy fields to include"),
 ):
-    total_result = await db.execute(select(func.count()).select_from(DraftInvoice).where(DraftInvoice.user_id == user.id))
-    total = total_result.scalar_one()
-    result = await db.execute(
-        select(DraftInvoice).where(DraftInvoice.user_id == user.id).order_by(DraftInvoice.created_at.desc()).limit(limit).offset(offset)
+    try:
+        extra = _draft_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    stmt = select(*DRAFT_SUMMARY_COLUMNS, *(DRAFT_DETAIL_COLUMNS[field] for field in extra)).where(
+        DraftInvoice.user_id == user.id
     )
-    items = result.scalars().all()
-    payload_items = []
-    for draft in items:
-        payload_items.append(
-            DraftInvoiceOut(
-                id=draft.id,
-                upload_id=draft.upload_id,
-                status=draft.status,
-                extracted_payload=draft.extracted_payload_json,
-                confirmed_payload=draft.confirmed_payload_json,
-                confidence=float(draft.confidence) if draft.confidence is not None else None,
-                warnings=draft.warnings_json or [],
-                raw_text_excerpt=draft.raw_text_excerpt,
-                created_at=draft.created_at,
-                updated_at=draft.updated_at,
-            )
+    try:
+        rows, next_cursor = await _page(db, stmt, DraftInvoice, limit, offset, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    total = None
+    if include_total:
+        total = await list_counts.get(
+            ("drafts", user.id),
+            lambda: _count(db, select(func.count()).select_from(DraftInvoice).where(DraftInvoice.user_id == user.id)),
         )
-    return ListResponse(items=payload_items, total=total, limit=limit, offset=offset)
+    items = [_draft_summary(row) for row in rows]
+    return FastJSONResponse(
+        {"items": items, "total": total, "limit": limit, "offset": offset, "next_cursor": next_cursor}
+    )
+
+
+@router.get("/export")
+async def export_invoices(
+    db: AsyncSession = Depends(get_read_db),
+    filters: list = Depends(_invoice_filters),
+    export_format: str = Query("ndjson", alias="format", pattern="^(csv|ndjson|parquet)$"),
+):
+    if export_format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"{export_format} export is not available")
+    repo = InvoiceRepository(db)
+    partitions = repo.stream_export_rows(filters, chunk_size=settings.EXPORT_CHUNK_SIZE)
+    try:
+        chunks = await start_export(export_format, partitions)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Export failed")
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="invoices.{export_format}"'},
+    )
+
+
+@router.get("/{invoice_id}", response_model=InvoiceOut)
+async def get_invoice(
+    invoice_id: str,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        invoice_uuid = uuid.UUID(invoice_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid invoice id")
+
+    detail = await InvoiceRepository(db).get_invoice_detail(invoice_uuid, user.id)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return detail
+
+
+async def _page(db: AsyncSession, stmt, model, limit: int, offset: int, cursor: str | None):
+    # Offset paging is kept for existing clients; cursors page on
+    # (created_at, id) so deep pages cost the same as the first.
+    if offset and not cursor:
+        stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).offset(offset).limit(limit + 1)
+    else:
+        stmt = apply_keyset(stmt, model.created_at, model.id, cursor, limit, descending=True)
+    rows = (await db.execute(stmt)).mappings().all()
+    return split_page(rows, limit, key=lambda row: (row["created_at"], row["id"]))
+
+
+async def _count(db: AsyncSession, stmt) -> int:
+    return (await db.execute(stmt)).scalar_one()
 
 
 @router.post("/{invoice_id}/validate")
@@ -352,13 +443,12 @@ async def validate_invoice(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid invoice id")
 
-    result = await db.execute(select(Invoice).where(Invoice.id == invoice_uuid))
-    invoice = result.scalar_one_or_none()
-    if not invoice or invoice.user_id != user.id:
+    repo = InvoiceRepository(db)
+    invoice = await repo.get_owned_invoice(invoice_uuid, user.id)
+    if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
-    repo = InvoiceRepository(db)
-    service = InvoiceValidationService(repo, tariff_client, fx_client)
+    service = InvoiceValidationService(repo, tariff_client, fx_rates)
     return await service.validate_invoice(invoice)
 
 
@@ -378,17 +468,115 @@ async def normalize_currency(
     if not target_currency:
         raise HTTPException(status_code=400, detail="target_currency required")
 
-    result = await db.execute(select(Invoice).where(Invoice.id == invoice_uuid))
-    invoice = result.scalar_one_or_none()
-    if not invoice or invoice.user_id != user.id:
+    repo = InvoiceRepository(db)
+    invoice = await repo.get_owned_invoice(invoice_uuid, user.id)
+    if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
-    repo = InvoiceRepository(db)
-    service = InvoiceValidationService(repo, tariff_client, fx_client)
-    normalized = await service.normalize_currency(invoice, target_currency)
+    service = InvoiceValidationService(repo, tariff_client, fx_rates)
+    try:
+        normalized = await service.normalize_currency(invoice, target_currency)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     return normalized
 
 
+@router.post("/{invoice_id}/duty")
+async def calculate_duty(
+    invoice_id: str,
+    payload: dict,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        invoice_uuid = uuid.UUID(invoice_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid invoice id")
+
+    on_date = None
+    if payload.get("date"):
+        on_date = parse_invoice_date(payload["date"])
+        if on_date is None:
+            raise HTTPException(status_code=400, detail="Invalid date")
+
+    repo = InvoiceRepository(db)
+    invoice = await repo.get_owned_invoice(invoice_uuid, user.id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    items = await repo.list_line_items(invoice.id)
+    calculator = DutyCalculator(tariff_client)
+    try:
+        return await calculator.calculate(
+            invoice,
+            items,
+            country_of_origin=payload.get("country_of_origin"),
+            on_date=on_date or parse_invoice_date(invoice.invoice_date),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/normalize-currency")
+async def normalize_currency_bulk(
+    payload: dict,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    target_currency = payload.get("target_currency")
+    if not target_currency:
+        raise HTTPException(status_code=400, detail="target_currency required")
+
+    filters = [Invoice.user_id == user.id]
+    invoice_ids = payload.get("invoice_ids")
+    if invoice_ids:
+        try:
+            filters.append(Invoice.id.in_([uuid.UUID(str(i)) for i in invoice_ids]))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid invoice id")
+    if payload.get("date_from"):
+        filters.append(Invoice.invoice_date >= payload["date_from"])
+    if payload.get("date_to"):
+        filters.append(Invoice.invoice_date <= payload["date_to"])
+
+    result = await db.execute(
+        select(Invoice.currency, Invoice.invoice_date).where(*filters).group_by(Invoice.currency, Invoice.invoice_date)
+    )
+    groups = [(currency, invoice_date) for currency, invoice_date in result.all()]
+    repo = InvoiceRepository(db)
+    service = InvoiceValidationService(repo, tariff_client, fx_rates)
+    rates = await service.group_rates(groups, target_currency)
+
+    if payload.get("persist"):
+        summary = await service.persist_normalization(
+            repo.iter_invoice_batches(filters), rates, target_currency
+        )
+        return {"target_currency": target_currency, "groups": len(groups), **summary}
+
+    async def _rows():
+        stream = await db.stream(
+            select(
+                Invoice.id,
+                Invoice.currency,
+                Invoice.invoice_date,
+                Invoice.total_value,
+                Invoice.freight_cost,
+                Invoice.insurance_cost,
+            ).where(*filters).order_by(Invoice.created_at, Invoice.id)
+        )
+        async for row in stream:
+            line = {"invoice_id": str(row.id), "currency": row.currency, "invoice_date": row.invoice_date}
+            rate = rates.get((row.currency, row.invoice_date))
+            if rate is None:
+                unparseable = row.invoice_date and parse_invoice_date(row.invoice_date) is None
+                line["error"] = "invoice_date unparseable" if unparseable else "fx rate unavailable"
+            else:
+                line.update(normalized_totals(row, target_currency, *rate))
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(_rows(), media_type="application/x-ndjson", headers={"X-FX-Rate-Groups": str(len(groups))})
+
+
 @router.post("/{invoice_id}/line-items/{line_item_id}/hs-code/resolve")
 async def resolve_hs_code(
     invoice_id: str,
@@ -407,35 +595,19 @@ async def resolve_hs_code(
     if not selected_code:
         raise HTTPException(status_code=400, detail="selected_code required")
 
-    result = await db.execute(select(Invoice).where(Invoice.id == invoice_uuid))
-    invoice = result.scalar_one_or_none()
-    if not invoice or invoice.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Invoice not found")
-
-    result = await db.execute(
-        select(InvoiceLineItem).where(InvoiceLineItem.id == line_uuid, InvoiceLineItem.invoice_id == invoice.id)
-    )
-    line = result.scalar_one_or_none()
+    repo = InvoiceRepository(db)
+    invoice, line, task = await repo.get_owned_line(invoice_uuid, line_uuid, user.id, open_task_type="HS_CODE_MISSING")
     if not line:
+        if not await repo.get_owned_invoice(invoice_uuid, user.id):
+            raise HTTPException(status_code=404, detail="Invoice not found")
         raise HTTPException(status_code=404, detail="Line item not found")
 
     line.validated_hs_code = selected_code
-    await db.commit()
-
-    result = await db.execute(
-        select(ValidationTask).where(
-            ValidationTask.invoice_id == invoice.id,
-            ValidationTask.line_item_id == line.id,
-            ValidationTask.task_type == "HS_CODE_MISSING",
-            ValidationTask.status == "OPEN",
-        )
-    )
-    task = result.scalar_one_or_none()
     if task:
         task.status = "RESOLVED"
         task.resolution_jsonb = {"selected_code": selected_code}
         task.resolved_at = datetime.utcnow()
-        await db.commit()
+    await db.commit()
 
     return {"status": "resolved", "validated_hs_code": selected_code}
 
@@ -458,34 +630,18 @@ async def refine_hs_code(
     if not chosen_child_code:
         raise HTTPException(status_code=400, detail="chosen_child_code required")
 
-    result = await db.execute(select(Invoice).where(Invoice.id == invoice_uuid))
-    invoice = result.scalar_one_or_none()
-    if not invoice or invoice.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Invoice not found")
-
-    result = await db.execute(
-        select(InvoiceLineItem).where(InvoiceLineItem.id == line_uuid, InvoiceLineItem.invoice_id == invoice.id)
-    )
-    line = result.scalar_one_or_none()
+    repo = InvoiceRepository(db)
+    invoice, line, task = await repo.get_owned_line(invoice_uuid, line_uuid, user.id, open_task_type="HS_CODE_REFINEMENT")
     if not line:
+        if not await repo.get_owned_invoice(invoice_uuid, user.id):
+            raise HTTPException(status_code=404, detail="Invoice not found")
         raise HTTPException(status_code=404, detail="Line item not found")
 
     line.validated_hs_code = chosen_child_code
-    await db.commit()
-
-    result = await db.execute(
-        select(ValidationTask).where(
-            ValidationTask.invoice_id == invoice.id,
-            ValidationTask.line_item_id == line.id,
-            ValidationTask.task_type == "HS_CODE_REFINEMENT",
-            ValidationTask.status == "OPEN",
-        )
-    )
-    task = result.scalar_one_or_none()
     if task:
         task.status = "RESOLVED"
         task.resolution_jsonb = payload
         task.resolved_at = datetime.utcnow()
-        await db.commit()
+    await db.commit()
 
     return {"status": "refined", "validated_hs_code": chosen_child_code}
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_read_db
 from app.models import CompanyUK
 from app.models.enums import AccountTypeEnum
 from app.schemas.me import MeResponse
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/me")
 
 
 @router.get("", response_model=MeResponse)
-async def read_me(user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def read_me(user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
     needs_companies_house_link = user.account_type == AccountTypeEnum.free
     needs_vat = False
     requires_manual_eori = False
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 import logging
 from app.core.config import settings
 from app.integrations.tariff import TariffClient
+from app.integrations.tariff_mirror import tariff_mirror
 
 router = APIRouter(prefix="/tariff")
 logger = logging.getLogger("uvicorn.error")
 
-client = TariffClient(settings.TARIFF_API_BASE_URL)
+client = TariffClient(settings.TARIFF_API_BASE_URL, mirror=tariff_mirror)
 
 
 @router.post("/search")
@@ -20,6 +21,22 @@ async def tariff_search(payload: dict):
     return {"results": results}
 
 
+@router.post("/search/batch")
+async def tariff_search_batch(payload: dict):
+    queries = payload.get("queries")
+    limit = payload.get("limit", 5)
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="queries required")
+    queries = [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+    if not queries:
+        raise HTTPException(status_code=400, detail="queries required")
+    if len(queries) > settings.TARIFF_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"at most {settings.TARIFF_BATCH_MAX_QUERIES} queries per batch")
+    results, errors = await client.search_many(queries, limit=limit, concurrency=settings.TARIFF_BATCH_CONCURRENCY)
+    logger.info("Tariff batch search queries=%s unique=%s errors=%s", len(queries), len(results) + len(errors), len(errors))
+    return {"results": results, "errors": errors}
+
+
 @router.get("/commodities/{code}/children")
 async def tariff_children(code: str):
     children = await client.children(code)
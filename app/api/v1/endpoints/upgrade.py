@@ -4,6 +4,7 @@ from sqlalchemy import select
 
 from app.api.deps import get_db, get_current_user, require_account_type
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.models import User, CompanyUK
 from app.models.enums import AccountTypeEnum, PlanEnum, StatusEnum
 from app.schemas.upgrade import (
@@ -110,6 +111,7 @@ async def uk_exporter_callback(
     if company_status.lower() == "dissolved":
         user.status = StatusEnum.blocked
         await db.commit()
+        principal_cache.invalidate(user.id)
         raise HTTPException(status_code=403, detail="Company dissolved; upgrade denied")
 
     result = await db.execute(select(CompanyUK).where(CompanyUK.user_id == user.id))
@@ -135,6 +137,7 @@ async def uk_exporter_callback(
     user.account_type = AccountTypeEnum.uk_exporter
     user.status = StatusEnum.active
     await db.commit()
+    principal_cache.invalidate(user.id)
     return {"status": "upgraded"}
 
 
@@ -202,4 +205,5 @@ async def eu_member_verify_vat(
         user.account_type = AccountTypeEnum.eu_member
         user.status = StatusEnum.active
         await db.commit()
+        principal_cache.invalidate(user.id)
     return EUVerifyVATResponse(is_valid=result.get("valid", False), name=result.get("name"), address=result.get("address"))
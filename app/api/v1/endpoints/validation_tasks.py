@@ -1,15 +1,100 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db
+from app.core.config import settings
+from app.core.pagination import split_page
 from app.repositories.invoice_repo import InvoiceRepository
-from app.schemas.validation import ValidationResolveRequest, ValidationTaskOut
+from app.schemas.validation import ValidationResolveRequest, ValidationTaskOut, ValidationBulkResolveRequest, ValidationTaskPage
 from app.models import ValidationTask
 from datetime import datetime
 
 router = APIRouter(prefix="/validation-tasks")
 
+HS_CODE_RESOLUTION_KEYS = {"HS_CODE_MISSING": "selected_code", "HS_CODE_REFINEMENT": "chosen_child_code"}
+
+
+def _task_out(task: ValidationTask) -> ValidationTaskOut:
+    return ValidationTaskOut(
+        id=task.id,
+        invoice_id=task.invoice_id,
+        line_item_id=task.line_item_id,
+        task_type=task.task_type,
+        status=task.status,
+        payload=task.payload_jsonb,
+        resolution=task.resolution_jsonb,
+        created_at=task.created_at,
+        resolved_at=task.resolved_at,
+    )
+
+
+@router.get("", response_model=ValidationTaskPage)
+async def list_tasks(
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    status: str | None = Query("OPEN"),
+    task_type: str | None = Query(None),
+    invoice_id: uuid.UUID | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+):
+    repo = InvoiceRepository(db)
+    try:
+        tasks = await repo.list_user_tasks(
+            user.id,
+            limit,
+            cursor=cursor,
+            status=status.upper() if status else None,
+            task_type=task_type.upper() if task_type else None,
+            invoice_id=invoice_id,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    page, next_cursor = split_page(tasks, limit)
+    return ValidationTaskPage(items=[_task_out(task) for task in page], next_cursor=next_cursor)
+
+
+@router.post("/resolve")
+async def resolve_tasks_bulk(
+    payload: ValidationBulkResolveRequest,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    if not payload.resolutions:
+        raise HTTPException(status_code=400, detail="resolutions required")
+    if len(payload.resolutions) > settings.VALIDATION_BULK_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"at most {settings.VALIDATION_BULK_MAX_TASKS} tasks per request")
+
+    resolutions = {item.task_id: item.resolution for item in payload.resolutions}
+    repo = InvoiceRepository(db)
+    tasks = await repo.get_owned_tasks(list(resolutions), user.id, status="OPEN")
+    not_open = set(resolutions) - {task.id for task in tasks}
+    if not_open:
+        closed = {task.id for task in await repo.get_owned_tasks(list(not_open), user.id)}
+        missing = not_open - closed
+        if missing:
+            raise HTTPException(status_code=404, detail={"message": "Task not found", "task_ids": sorted(map(str, missing))})
+        raise HTTPException(status_code=409, detail={"message": "Task is not open", "task_ids": sorted(map(str, closed))})
+
+    codes = {}
+    for task in tasks:
+        key = HS_CODE_RESOLUTION_KEYS.get(task.task_type)
+        code = resolutions[task.id].get(key) if key else None
+        if code and task.line_item_id:
+            codes[task.line_item_id] = code
+    if codes:
+        for line in await repo.get_line_items(list(codes)):
+            line.validated_hs_code = codes[line.id]
+
+    resolved_at = datetime.utcnow()
+    for task in tasks:
+        task.resolution_jsonb = resolutions[task.id]
+        task.status = "RESOLVED"
+        task.resolved_at = resolved_at
+    await db.commit()
+    return {"resolved": [_task_out(task) for task in tasks], "hs_codes_updated": len(codes)}
+
 
 @router.post("/{task_id}/resolve", response_model=ValidationTaskOut)
 async def resolve_task(
@@ -33,14 +118,4 @@ async def resolve_task(
     task.resolved_at = datetime.utcnow()
     await db.commit()
     await db.refresh(task)
-    return ValidationTaskOut(
-        id=task.id,
-        invoice_id=task.invoice_id,
-        line_item_id=task.line_item_id,
-        task_type=task.task_type,
-        status=task.status,
-        payload=task.payload_jsonb,
-        resolution=task.resolution_jsonb,
-        created_at=task.created_at,
-        resolved_at=task.resolved_at,
-    )
+    return _task_out(task)
@@ -0,0 +1,45 @@
+from datetime import date, datetime
+
+# Slashed, dotted and dashed numeric dates are read day-first, as on UK and
+# EU commercial invoices.
+INVOICE_DATE_FORMATS = (
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%d-%m-%Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%b %d %Y",
+    "%B %d %Y",
+)
+
+
+def parse_invoice_date(value: str | None) -> date | None:
+    if not value:
+        return None
+    text = value.strip()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    for fmt in INVOICE_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def hs_code_digits(code: str | None) -> str | None:
+    if code is None:
+        return None
+    digits = "".join(ch for ch in str(code) if ch.isdigit())
+    return digits or None
+
+
+def currency_code(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return value.strip().upper()
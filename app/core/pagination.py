@@ -0,0 +1,65 @@
+import base64
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def apply_keyset(stmt, created_col, id_col, cursor: str | None, limit: int, descending: bool = False):
+    if cursor:
+        position = decode_cursor(cursor)
+        if descending:
+            stmt = stmt.where(tuple_(created_col, id_col) < position)
+        else:
+            stmt = stmt.where(tuple_(created_col, id_col) > position)
+    if descending:
+        stmt = stmt.order_by(created_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(created_col.asc(), id_col.asc())
+    return stmt.limit(limit + 1)
+
+
+def split_page(rows: list, limit: int, key=lambda row: (row.created_at, row.id)) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+class CountCache:
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+    async def get(self, key: tuple, compute: Callable[[], Awaitable[int]]) -> int:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        value = await compute()
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: tuple) -> None:
+        self._entries.pop(key, None)
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models import User
+
+
+class PrincipalCache:
+    # Column snapshots of recently authenticated users, keyed by token subject.
+    # Entries are rebuilt as detached instances and merged without a SELECT,
+    # so cached principals behave like loaded rows in the request session.
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, subject: str) -> dict | None:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if time.monotonic() > expires_at:
+            self._entries.pop(subject, None)
+            return None
+        self._entries.move_to_end(subject)
+        return snapshot
+
+    def put(self, subject: str, user: User) -> None:
+        if not self.enabled:
+            return
+        snapshot = {key: getattr(user, key) for key in self._columns}
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, snapshot)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def attach(self, db: AsyncSession, snapshot: dict) -> User:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
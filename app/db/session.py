@@ -1,5 +1,154 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from collections import OrderedDict
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
 from app.core.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.checkouts += 1
+        return connection
+
+
+def engine_options(url: str) -> tuple[str, dict]:
+    parsed = make_url(url)
+    options: dict = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if parsed.get_backend_name() == "sqlite":
+        return url, options
+
+    if settings.DB_POOL_SIZE > 0:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    else:
+        options["poolclass"] = NullPool
+
+    if parsed.get_driver_name() == "asyncpg":
+        connect_args: dict = {}
+        if settings.DB_COMMAND_TIMEOUT is not None:
+            connect_args["command_timeout"] = settings.DB_COMMAND_TIMEOUT
+        cache_size = settings.DB_STATEMENT_CACHE_SIZE
+        if settings.DB_PGBOUNCER:
+            # Transaction-mode PgBouncer can hand each statement to a different
+            # server connection, so named prepared statements must not be reused.
+            cache_size = 0
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        parsed = parsed.update_query_dict({"prepared_statement_cache_size": str(cache_size)})
+        if connect_args:
+            options["connect_args"] = connect_args
+    return parsed.render_as_string(hide_password=False), options
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_ms_total=round(pool.wait_seconds * 1000, 3),
+            wait_ms_avg=round(pool.wait_seconds * 1000 / pool.checkouts, 3) if pool.checkouts else 0.0,
+            wait_ms_max=round(pool.max_wait_seconds * 1000, 3),
+        )
+    return stats
+
+
+class ReadYourWrites:
+    # Users who just committed a write read from the primary until the
+    # replica has had time to catch up. Pins are per process. The window is
+    # fixed, so insertion order is expiry order and expired pins are swept
+    # from the front on every write.
+    def __init__(self, window_seconds: int = 5):
+        self.window_seconds = window_seconds
+        self._pinned: OrderedDict[str, float] = OrderedDict()
+
+    def pin(self, user_id) -> None:
+        if self.window_seconds <= 0:
+            return
+        now = time.monotonic()
+        key = str(user_id)
+        self._pinned[key] = now + self.window_seconds
+        self._pinned.move_to_end(key)
+        while self._pinned:
+            oldest, until = next(iter(self._pinned.items()))
+            if until > now:
+                break
+            del self._pinned[oldest]
+
+    def is_pinned(self, user_id) -> bool:
+        until = self._pinned.get(str(user_id))
+        if until is None:
+            return False
+        if time.monotonic() >= until:
+            self._pinned.pop(str(user_id), None)
+            return False
+        return True
+
+
+read_your_writes = ReadYourWrites(settings.READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_write(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session: Session) -> None:
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        read_your_writes.pin(session.info["user_id"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write(session: Session) -> None:
+    session.info.pop("wrote", None)
+
+
+database_url, database_options = engine_options(settings.DATABASE_URL)
+engine = create_async_engine(database_url, **database_options)
 SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_url, replica_options = engine_options(settings.DATABASE_REPLICA_URL)
+    replica_engine = create_async_engine(replica_url, **replica_options)
+    ReplicaSessionLocal = async_sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
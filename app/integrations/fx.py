@@ -1,3 +1,9 @@
+import asyncio
+import time
+from bisect import bisect_right, insort
+from datetime import date, timedelta
+from decimal import Decimal
+
 import httpx
 
 
@@ -5,29 +11,140 @@ class FXClient:
     def __init__(self, base_url: str, api_key: str | None = None):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
+        if self.base_url.endswith("/latest"):
+            self.api_root = self.base_url[: -len("/latest")]
+            self.latest_url = self.base_url
+        else:
+            self.api_root = self.base_url
+            self.latest_url = f"{self.base_url}/latest"
 
-    async def quote(self, base: str, quote: str, amount: float) -> dict:
+    def _headers(self) -> dict:
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
-        params = {"amount": amount, "from": base.upper(), "to": quote.upper()}
+        return headers
+
+    async def rates(self, base: str, on_date: date | None = None) -> dict:
+        url = self.latest_url if on_date is None else f"{self.api_root}/{on_date.isoformat()}"
         async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(self.base_url, params=params, headers=headers)
+            resp = await client.get(url, params={"from": base.upper()}, headers=self._headers())
             resp.raise_for_status()
             data = resp.json()
 
         rates = data.get("rates", {}) if isinstance(data, dict) else {}
-        converted = rates.get(quote.upper())
-        if converted is None:
-            raise ValueError("rate not found")
-        rate = float(converted) / float(amount) if amount else None
+        if not rates:
+            raise ValueError("rate table unavailable")
+        return {
+            "base": base.upper(),
+            "date": data.get("date"),
+            "rates": {currency.upper(): Decimal(str(value)) for currency, value in rates.items()},
+        }
+
+    async def series(self, base: str, start: date, end: date) -> dict[str, dict[str, Decimal]]:
+        url = f"{self.api_root}/{start.isoformat()}..{end.isoformat()}"
+        async with httpx.AsyncClient(timeout=30) as client:
+            resp = await client.get(url, params={"from": base.upper()}, headers=self._headers())
+            resp.raise_for_status()
+            data = resp.json()
+
+        rates = data.get("rates", {}) if isinstance(data, dict) else {}
+        return {
+            day: {currency.upper(): Decimal(str(value)) for currency, value in table.items()}
+            for day, table in rates.items()
+        }
+
+
+class FXRateStore:
+    def __init__(self, client: FXClient, ttl_seconds: int = 3600, lookback_days: int = 7):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.lookback_days = lookback_days
+        self._latest: dict[str, tuple[float, dict]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._series: dict[str, dict[date, dict[str, Decimal]]] = {}
+        self._dates: dict[str, list[date]] = {}
+        self._covered: dict[str, list[tuple[date, date]]] = {}
+
+    async def table(self, base: str) -> dict:
+        base = base.upper()
+        entry = self._latest.get(base)
+        if entry and time.time() < entry[0]:
+            return entry[1]
+        lock = self._locks.setdefault(base, asyncio.Lock())
+        async with lock:
+            entry = self._latest.get(base)
+            if entry and time.time() < entry[0]:
+                return entry[1]
+            table = await self.client.rates(base)
+            self._latest[base] = (time.time() + self.ttl_seconds, table)
+            return table
+
+    async def rate(self, base: str, quote: str) -> tuple[Decimal, str | None]:
+        base, quote = base.upper(), quote.upper()
+        if base == quote:
+            return Decimal("1"), None
+        table = await self.table(base)
+        rate = table["rates"].get(quote)
         if rate is None:
             raise ValueError("rate not found")
+        return rate, table["date"]
+
+    async def quote(self, base: str, quote: str, amount: Decimal | float, on_date: date | None = None) -> dict:
+        rate, rate_date = await self.rate_on(base, quote, on_date)
+        amount = Decimal(str(amount))
         return {
             "base": base.upper(),
             "quote": quote.upper(),
-            "amount": amount,
-            "rate": rate,
-            "converted": float(converted),
-            "date": data.get("date") if isinstance(data, dict) else None,
+            "amount": float(amount),
+            "rate": float(rate),
+            "converted": float(amount * rate),
+            "date": rate_date,
         }
+
+    def is_covered(self, base: str, day: date) -> bool:
+        return any(start <= day <= end for start, end in self._covered.get(base.upper(), []))
+
+    async def backfill(self, base: str, start: date, end: date) -> int:
+        base = base.upper()
+        end = min(end, date.today())
+        fetch_start = start - timedelta(days=self.lookback_days)
+        if fetch_start > end:
+            return 0
+        series = await self.client.series(base, fetch_start, end)
+        tables = self._series.setdefault(base, {})
+        dates = self._dates.setdefault(base, [])
+        for day_str, rates in series.items():
+            day = date.fromisoformat(day_str)
+            if day not in tables:
+                insort(dates, day)
+            tables[day] = rates
+        self._covered.setdefault(base, []).append((start, end))
+        return len(series)
+
+    async def rate_on(self, base: str, quote: str, on_date: date | None) -> tuple[Decimal, str | None]:
+        base, quote = base.upper(), quote.upper()
+        if base == quote:
+            return Decimal("1"), None
+        if on_date is None or on_date >= date.today():
+            return await self.rate(base, quote)
+        if not self.is_covered(base, on_date):
+            async with self._locks.setdefault(f"series:{base}", asyncio.Lock()):
+                if not self.is_covered(base, on_date):
+                    await self.backfill(base, on_date, on_date)
+        return self.lookup(base, quote, on_date)
+
+    def lookup(self, base: str, quote: str, on_date: date) -> tuple[Decimal, str | None]:
+        base, quote = base.upper(), quote.upper()
+        if base == quote:
+            return Decimal("1"), None
+        dates = self._dates.get(base) or []
+        if not dates:
+            raise ValueError("rate not found")
+        index = bisect_right(dates, on_date) - 1
+        if index < 0:
+            raise ValueError(f"no rate on or before {on_date.isoformat()}")
+        day = dates[index]
+        rate = self._series[base][day].get(quote)
+        if rate is None:
+            raise ValueError("rate not found")
+        return rate, day.isoformat()
@@ -0,0 +1,134 @@
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+MAGIC = b"HSTRIE01"
+HEADER = struct.Struct("<8sI")
+TERMINAL = 1
+LEAF = 2
+
+
+def code_pairs(code: str) -> list[int]:
+    digits = "".join(ch for ch in str(code) if ch.isdigit())[:10]
+    if not digits or len(digits) % 2:
+        return []
+    pairs = [int(digits[i:i + 2]) for i in range(0, len(digits), 2)]
+    while len(pairs) > 1 and pairs[-1] == 0:
+        pairs.pop()
+    return pairs
+
+
+def pairs_to_code(pairs: list[int]) -> str:
+    return "".join(f"{pair:02d}" for pair in pairs).ljust(10, "0")
+
+
+class HSCodeTrie:
+    # Nodes are stored breadth-first, so each node's children are a contiguous
+    # label-sorted run and a lookup is one binary search per digit pair.
+    def __init__(self, labels, first_child, child_count, flags):
+        self._labels = labels
+        self._first_child = first_child
+        self._child_count = child_count
+        self._flags = flags
+
+    def __len__(self) -> int:
+        return sum(1 for flag in self._flags if flag & TERMINAL)
+
+    @classmethod
+    def build(cls, codes: Iterable[tuple[str, bool]]) -> "HSCodeTrie":
+        root: dict = {}
+        node_flags: dict[int, int] = {}
+        for code, leaf in codes:
+            pairs = code_pairs(code)
+            if not pairs:
+                continue
+            node = root
+            for pair in pairs:
+                node = node.setdefault(pair, {})
+            node_flags[id(node)] = node_flags.get(id(node), 0) | TERMINAL | (LEAF if leaf else 0)
+
+        labels, first_child, child_count, flags = array("i", [0]), array("i", [0]), array("i", [0]), array("i", [0])
+        queue = [root]
+        position = 0
+        while position < len(queue):
+            node = queue[position]
+            first_child[position] = len(queue)
+            child_count[position] = len(node)
+            for label in sorted(node):
+                child = node[label]
+                queue.append(child)
+                labels.append(label)
+                first_child.append(0)
+                child_count.append(0)
+                flags.append(node_flags.get(id(child), 0))
+            position += 1
+        return cls(labels, first_child, child_count, flags)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self._labels)))
+            for values in (self._labels, self._first_child, self._child_count, self._flags):
+                array("i", values).tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "HSCodeTrie":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError("not an HS code trie file")
+        view = memoryview(mapped)[HEADER.size:].cast("i")
+        return cls(*(view[i * count:(i + 1) * count] for i in range(4)))
+
+    def _find(self, code: str) -> int | None:
+        pairs = code_pairs(code)
+        if not pairs:
+            return None
+        node = 0
+        for pair in pairs:
+            start = self._first_child[node]
+            end = start + self._child_count[node]
+            index = bisect_left(self._labels, pair, start, end)
+            if index == end or self._labels[index] != pair:
+                return None
+            node = index
+        return node
+
+    def is_valid(self, code: str) -> bool:
+        node = self._find(code)
+        return node is not None and bool(self._flags[node] & TERMINAL)
+
+    def is_leaf(self, code: str) -> bool:
+        node = self._find(code)
+        if node is None or not self._flags[node] & TERMINAL:
+            return False
+        return bool(self._flags[node] & LEAF) or not self._has_terminal_below(node)
+
+    def children(self, code: str) -> list[str]:
+        node = self._find(code)
+        if node is None:
+            return []
+        return list(self._walk(node, code_pairs(code), nearest_only=True))
+
+    def descendants(self, code: str) -> list[str]:
+        node = self._find(code)
+        if node is None:
+            return []
+        return list(self._walk(node, code_pairs(code), nearest_only=False))
+
+    def _has_terminal_below(self, node: int) -> bool:
+        return next(self._walk(node, [], nearest_only=True), None) is not None
+
+    def _walk(self, node: int, prefix: list[int], nearest_only: bool):
+        stack = [(node, prefix)]
+        while stack:
+            current, pairs = stack.pop()
+            if current != node and self._flags[current] & TERMINAL:
+                yield pairs_to_code(pairs)
+                if nearest_only:
+                    continue
+            start = self._first_child[current]
+            for child in range(start + self._child_count[current] - 1, start - 1, -1):
+                stack.append((child, pairs + [self._labels[child]]))
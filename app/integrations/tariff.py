@@ -1,14 +1,44 @@
+import asyncio
+import re
 import time
 import httpx
+from datetime import date
+from decimal import Decimal
 from typing import Any
 
+from app.integrations.tariff_mirror import TariffMirror, normalize_code
+
+THIRD_COUNTRY_MEASURE_TYPES = {"103", "105"}
+PREFERENTIAL_MEASURE_TYPES = {"142", "145", "106"}
+VAT_MEASURE_TYPES = {"305"}
+AD_VALOREM_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*%\s*$")
+
+
+def _relationship_id(item: dict, name: str) -> str | None:
+    data = ((item.get("relationships") or {}).get(name) or {}).get("data")
+    return str(data.get("id")) if isinstance(data, dict) and data.get("id") is not None else None
+
+
+def _ad_valorem(expression: str | None) -> Decimal | None:
+    match = AD_VALOREM_RE.match(expression or "")
+    return Decimal(match.group(1)) if match else None
+
+
+def all_ad_valorem(expressions: list[str]) -> bool:
+    return all(_ad_valorem(expression) is not None for expression in expressions)
+
 
 class TariffClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, mirror: TariffMirror | None = None):
         self.base_url = base_url.rstrip("/")
+        self.mirror = mirror
         self._cache: dict[str, tuple[float, Any]] = {}
         self.ttl_seconds = 3600
 
+    @property
+    def offline(self) -> bool:
+        return self.mirror is not None and self.mirror.loaded
+
     def _get_cached(self, key: str):
         entry = self._cache.get(key)
         if not entry:
@@ -23,17 +53,53 @@ class TariffClient:
         self._cache[key] = (time.time() + self.ttl_seconds, value)
 
     async def search(self, query: str, limit: int = 5) -> list[dict]:
+        if self.offline:
+            return self.mirror.search(query, limit=limit)
         cache_key = f"search:{query}:{limit}"
         cached = self._get_cached(cache_key)
         if cached is not None:
             return cached
-        url = f"{self.base_url}/search"
         async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(url, params={"q": query, "limit": limit})
-            resp.raise_for_status()
-            data = resp.json()
-        results = self._normalize_search_response(data, limit)
-        self._set_cache(cache_key, results)
+            return await self._fetch_search(client, query, limit)
+
+    async def search_many(
+        self, queries: list[str], limit: int = 5, concurrency: int = 8
+    ) -> tuple[dict[str, list[dict]], dict[str, str]]:
+        results: dict[str, list[dict]] = {}
+        errors: dict[str, str] = {}
+        misses = []
+        for query in dict.fromkeys(queries):
+            if self.offline:
+                results[query] = self.mirror.search(query, limit=limit)
+                continue
+            cached = self._get_cached(f"search:{query}:{limit}")
+            if cached is not None:
+                results[query] = cached
+            else:
+                misses.append(query)
+        if not misses:
+            return results, errors
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _bounded(client: httpx.AsyncClient, query: str) -> list[dict]:
+            async with semaphore:
+                return await self._fetch_search(client, query, limit)
+
+        async with httpx.AsyncClient(timeout=10) as client:
+            fetched = await asyncio.gather(*(_bounded(client, query) for query in misses), return_exceptions=True)
+        for query, outcome in zip(misses, fetched):
+            if isinstance(outcome, Exception):
+                errors[query] = "upstream search failed"
+            else:
+                results[query] = outcome
+        return results, errors
+
+    async def _fetch_search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[dict]:
+        resp = await client.get(f"{self.base_url}/search", params={"q": query, "limit": limit})
+        resp.raise_for_status()
+        results = self._normalize_search_response(resp.json(), limit)
+        self._set_cache(f"search:{query}:{limit}", results)
         return results
 
     def _normalize_search_response(self, data: dict, limit: int) -> list[dict]:
@@ -59,7 +125,14 @@ class TariffClient:
         combined = [c for c in combined if c.get("code")]
         return combined[:limit]
 
+    def candidate_codes(self, code: str) -> list[dict]:
+        if not self.offline:
+            return []
+        return self.mirror.child_codes(code)
+
     async def children(self, code: str) -> list[dict]:
+        if self.offline:
+            return self.mirror.children(code)
         cache_key = f"children:{code}"
         cached = self._get_cached(cache_key)
         if cached is not None:
@@ -72,3 +145,59 @@ class TariffClient:
         children = data.get("data", []) if isinstance(data, dict) else data
         self._set_cache(cache_key, children)
         return children
+
+    async def measures(self, code: str, country_of_origin: str | None = None, on_date: date | None = None) -> dict:
+        code = normalize_code(code)
+        origin = (country_of_origin or "").upper() or None
+        cache_key = f"measures:{code}:{origin or '-'}:{on_date.isoformat() if on_date else 'today'}"
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        params = {}
+        if origin:
+            params["filter[geographical_area_id]"] = origin
+        if on_date:
+            params["as_of"] = on_date.isoformat()
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(f"{self.base_url}/commodities/{code}", params=params)
+            resp.raise_for_status()
+            data = resp.json()
+        measures = self._normalize_measures(code, data, origin)
+        self._set_cache(cache_key, measures)
+        return measures
+
+    def _normalize_measures(self, code: str, data: dict, country_of_origin: str | None = None) -> dict:
+        included = data.get("included", []) if isinstance(data, dict) else []
+        expressions = {
+            str(item.get("id")): (item.get("attributes") or {}).get("base")
+            for item in included
+            if isinstance(item, dict) and item.get("type") == "duty_expression"
+        }
+        third_country: list[str | None] = []
+        preferential: list[str | None] = []
+        vat: list[str | None] = []
+        for item in included:
+            if not isinstance(item, dict) or item.get("type") != "measure":
+                continue
+            measure_type = _relationship_id(item, "measure_type")
+            expression = expressions.get(_relationship_id(item, "duty_expression") or "")
+            if measure_type in THIRD_COUNTRY_MEASURE_TYPES:
+                third_country.append(expression)
+            elif measure_type in PREFERENTIAL_MEASURE_TYPES:
+                preferential.append(expression)
+            elif measure_type in VAT_MEASURE_TYPES:
+                vat.append(expression)
+
+        def _lowest(values: list[str | None]) -> Decimal | None:
+            rates = [rate for rate in map(_ad_valorem, values) if rate is not None]
+            return min(rates) if rates else None
+
+        return {
+            "code": code,
+            "country_of_origin": country_of_origin,
+            "third_country_duty": _lowest(third_country),
+            "preferential_duty": _lowest(preferential),
+            "vat": _lowest(vat),
+            "third_country_expressions": [e for e in third_country if e],
+            "preferential_expressions": [e for e in preferential if e],
+        }
@@ -0,0 +1,135 @@
+import heapq
+import math
+import re
+from array import array
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+COMPOUND_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)+")
+STOPWORDS = frozenset({"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+
+def tokenize(text: str | None) -> list[str]:
+    lowered = (text or "").lower()
+    tokens = [
+        token
+        for token in TOKEN_RE.findall(lowered)
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+    tokens.extend(compound.replace("-", "") for compound in COMPOUND_RE.findall(lowered))
+    return tokens
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CommoditySearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, fuzzy_threshold: float = 0.3, fuzzy_expansions: int = 3):
+        self.k1 = k1
+        self.b = b
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_expansions = fuzzy_expansions
+        self._doc_keys: list = []
+        self._doc_lengths = array("I")
+        self._avg_length = 0.0
+        self._terms: dict[str, int] = {}
+        self._vocabulary: list[str] = []
+        self._postings_docs: list[array] = []
+        self._postings_tf: list[array] = []
+        self._idf: list[float] = []
+        self._trigrams: dict[str, array] = {}
+        self._term_trigram_counts = array("H")
+
+    def __len__(self) -> int:
+        return len(self._doc_keys)
+
+    def build(self, documents: list[tuple[object, str | None]]) -> None:
+        terms: dict[str, int] = {}
+        vocabulary: list[str] = []
+        postings_docs: list[array] = []
+        postings_tf: list[array] = []
+        doc_keys = []
+        doc_lengths = array("I")
+
+        for doc_id, (key, text) in enumerate(documents):
+            tokens = tokenize(text)
+            doc_keys.append(key)
+            doc_lengths.append(len(tokens))
+            counts: dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_id = terms.get(token)
+                if term_id is None:
+                    term_id = terms[token] = len(vocabulary)
+                    vocabulary.append(token)
+                    postings_docs.append(array("I"))
+                    postings_tf.append(array("H"))
+                postings_docs[term_id].append(doc_id)
+                postings_tf[term_id].append(min(tf, 0xFFFF))
+
+        n_docs = len(doc_keys)
+        self._idf = [
+            math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for docs in postings_docs
+        ]
+
+        grams: dict[str, array] = {}
+        gram_counts = array("H")
+        for term_id, term in enumerate(vocabulary):
+            term_grams = trigrams(term)
+            gram_counts.append(len(term_grams))
+            for gram in term_grams:
+                grams.setdefault(gram, array("I")).append(term_id)
+
+        self._doc_keys = doc_keys
+        self._doc_lengths = doc_lengths
+        self._avg_length = (sum(doc_lengths) / n_docs) if n_docs else 0.0
+        self._terms = terms
+        self._vocabulary = vocabulary
+        self._postings_docs = postings_docs
+        self._postings_tf = postings_tf
+        self._trigrams = grams
+        self._term_trigram_counts = gram_counts
+
+    def _fuzzy_terms(self, token: str) -> list[tuple[int, float]]:
+        query_grams = trigrams(token)
+        overlaps: dict[int, int] = {}
+        for gram in query_grams:
+            for term_id in self._trigrams.get(gram, ()):
+                overlaps[term_id] = overlaps.get(term_id, 0) + 1
+        candidates = []
+        for term_id, shared in overlaps.items():
+            similarity = shared / (len(query_grams) + self._term_trigram_counts[term_id] - shared)
+            if similarity >= self.fuzzy_threshold:
+                candidates.append((similarity, term_id))
+        return [(term_id, similarity) for similarity, term_id in heapq.nlargest(self.fuzzy_expansions, candidates)]
+
+    def _expand(self, query: str) -> dict[int, float]:
+        weights: dict[int, float] = {}
+        for token in tokenize(query):
+            term_id = self._terms.get(token)
+            matches = [(term_id, 1.0)] if term_id is not None else self._fuzzy_terms(token)
+            for match_id, weight in matches:
+                if weight > weights.get(match_id, 0.0):
+                    weights[match_id] = weight
+        return weights
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[object, float]]:
+        if not self._doc_keys:
+            return []
+        weights = self._expand(query)
+        if not weights:
+            return []
+
+        k1, b, avg_length, lengths = self.k1, self.b, self._avg_length or 1.0, self._doc_lengths
+        scores: dict[int, float] = {}
+        for term_id, weight in weights.items():
+            idf = self._idf[term_id] * weight
+            for doc_id, tf in zip(self._postings_docs[term_id], self._postings_tf[term_id]):
+                norm = k1 * (1 - b + b * lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self._doc_keys[doc_id], round(score, 4)) for doc_id, score in top]
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import Any
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.integrations.hs_trie import HSCodeTrie
+from app.integrations.tariff_index import CommoditySearchIndex
+from app.models import TariffCommodity
+
+logger = logging.getLogger("uvicorn.error")
+
+DECLARABLE_SUFFIX = "80"
+
+
+def normalize_code(code: str) -> str:
+    digits = "".join(ch for ch in str(code) if ch.isdigit())
+    return digits[:10].ljust(10, "0")
+
+
+class TariffMirror:
+    def __init__(self):
+        self._nodes: dict[int, dict[str, Any]] = {}
+        self._by_code: dict[str, list[int]] = {}
+        self._children: dict[int, list[int]] = {}
+        self._index = CommoditySearchIndex()
+        self.trie = HSCodeTrie.build([])
+        self._version: tuple[Any, int] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._nodes)
+
+    async def load(self, db: AsyncSession) -> int:
+        result = await db.execute(select(TariffCommodity))
+        rows = result.scalars().all()
+        self.rebuild(
+            [
+                {
+                    "sid": row.sid,
+                    "code": row.code,
+                    "producline_suffix": row.producline_suffix,
+                    "description": row.description,
+                    "parent_sid": row.parent_sid,
+                    "number_indents": row.number_indents,
+                    "leaf": row.leaf,
+                }
+                for row in rows
+            ]
+        )
+        self._version = await self._current_version(db)
+        logger.info("Tariff mirror loaded nodes=%s", len(self._nodes))
+        return len(self._nodes)
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        if self._version is not None and await self._current_version(db) == self._version:
+            return False
+        await self.load(db)
+        return True
+
+    async def refresh_periodically(self, session_factory: async_sessionmaker, interval_seconds: int) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except Exception:
+                logger.exception("Tariff mirror refresh failed")
+
+    async def _current_version(self, db: AsyncSession) -> tuple[Any, int]:
+        result = await db.execute(select(func.max(TariffCommodity.synced_at), func.count()).select_from(TariffCommodity))
+        latest, count = result.one()
+        return latest, count
+
+    def rebuild(self, nodes: list[dict[str, Any]]) -> None:
+        by_sid: dict[int, dict[str, Any]] = {}
+        by_code: dict[str, list[int]] = {}
+        children: dict[int, list[int]] = {}
+        for node in nodes:
+            by_sid[node["sid"]] = node
+            by_code.setdefault(node["code"], []).append(node["sid"])
+        for node in nodes:
+            parent_sid = node.get("parent_sid")
+            if parent_sid is not None and parent_sid in by_sid:
+                children.setdefault(parent_sid, []).append(node["sid"])
+        for sids in children.values():
+            sids.sort(key=lambda sid: (by_sid[sid]["code"], by_sid[sid]["producline_suffix"]))
+        index = CommoditySearchIndex()
+        index.build([(node["sid"], node.get("description")) for node in nodes])
+        trie = HSCodeTrie.build(
+            (node["code"], node["leaf"]) for node in nodes if node["producline_suffix"] == DECLARABLE_SUFFIX
+        )
+        self._nodes, self._by_code, self._children, self._index, self.trie = by_sid, by_code, children, index, trie
+
+    def lookup(self, code: str) -> dict[str, Any] | None:
+        sids = self._by_code.get(normalize_code(code))
+        if not sids:
+            return None
+        for sid in sids:
+            if self._nodes[sid]["producline_suffix"] == DECLARABLE_SUFFIX:
+                return self._nodes[sid]
+        return self._nodes[sids[-1]]
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        results = []
+        for sid, score in self._index.search(query, limit=limit):
+            node = self._nodes[sid]
+            results.append({"code": node["code"], "description": node["description"], "score": score})
+        return results
+
+    def child_codes(self, code: str) -> list[dict]:
+        results = []
+        for child_code in self.trie.children(code):
+            node = self.lookup(child_code)
+            results.append(
+                {
+                    "code": child_code,
+                    "description": node["description"] if node else None,
+                    "leaf": self.trie.is_leaf(child_code),
+                }
+            )
+        return results
+
+    def children(self, code: str) -> list[dict]:
+        sids = sorted(self._by_code.get(normalize_code(code), []), key=lambda sid: self._nodes[sid]["producline_suffix"])
+        for sid in sids:
+            if sid in self._children:
+                return [self._as_resource(self._nodes[child]) for child in self._children[sid]]
+        return []
+
+    def _as_resource(self, node: dict[str, Any]) -> dict:
+        return {
+            "id": str(node["sid"]),
+            "type": "commodity",
+            "attributes": {
+                "goods_nomenclature_sid": node["sid"],
+                "goods_nomenclature_item_id": node["code"],
+                "producline_suffix": node["producline_suffix"],
+                "description": node["description"],
+                "number_indents": node["number_indents"],
+                "leaf": node["leaf"],
+                "parent_sid": node["parent_sid"],
+            },
+        }
+
+
+tariff_mirror = TariffMirror()
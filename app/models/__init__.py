@@ -9,6 +9,7 @@ from app.models.buyer_eu import BuyerEU
 from app.models.oauth_state import OAuthState
 from app.models.refresh_token import RefreshToken
 from app.models.invoice import UploadedDocument, DraftInvoice, Invoice, InvoiceLineItem, ValidationTask
+from app.models.tariff import TariffCommodity
 
 __all__ = [
     "User",
@@ -26,4 +27,5 @@ __all__ = [
     "Invoice",
     "InvoiceLineItem",
     "ValidationTask",
+    "TariffCommodity",
 ]
@@ -1,9 +1,10 @@
 import uuid
-from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, Numeric, JSON, Integer
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import date, datetime
+from sqlalchemy import String, Date, DateTime, ForeignKey, Numeric, JSON, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy import Uuid
 
+from app.core.normalize import currency_code, hs_code_digits, parse_invoice_date
 from app.db.base import Base
 
 
@@ -22,6 +23,7 @@ class UploadedDocument(Base):
 
 class DraftInvoice(Base):
     __tablename__ = "draft_invoices"
+    __table_args__ = (Index("ix_draft_invoices_user_created", "user_id", "created_at", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -39,12 +41,32 @@ class DraftInvoice(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_user_created", "user_id", "created_at", "id"),
+        Index("ix_invoices_user_currency_created", "user_id", "currency", "created_at", "id"),
+        Index("ix_invoices_user_invoice_date_value", "user_id", "invoice_date_value"),
+        Index("ix_invoices_user_total_value", "user_id", "total_value"),
+        Index(
+            "ix_invoices_supplier_name_trgm",
+            "supplier_name",
+            postgresql_using="gin",
+            postgresql_ops={"supplier_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_invoices_invoice_number_trgm",
+            "invoice_number",
+            postgresql_using="gin",
+            postgresql_ops={"invoice_number": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     supplier_name: Mapped[str | None] = mapped_column(String(255))
     invoice_number: Mapped[str | None] = mapped_column(String(100))
     invoice_date: Mapped[str | None] = mapped_column(String(20))
+    # Parsed from invoice_date; the raw string is kept as extracted/typed.
+    invoice_date_value: Mapped[date | None] = mapped_column(Date, nullable=True)
     due_date: Mapped[str | None] = mapped_column(String(20))
     incoterm: Mapped[str | None] = mapped_column(String(10))
     currency: Mapped[str] = mapped_column(String(10), nullable=False)
@@ -52,15 +74,53 @@ class Invoice(Base):
     freight_cost: Mapped[float | None] = mapped_column(Numeric(18, 6))
     insurance_cost: Mapped[float | None] = mapped_column(Numeric(18, 6))
     status: Mapped[str] = mapped_column(String(32), default="DRAFT", nullable=False)
+    normalized_currency: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    normalized_total_value: Mapped[float | None] = mapped_column(Numeric(18, 6), nullable=True)
+    normalized_freight_cost: Mapped[float | None] = mapped_column(Numeric(18, 6), nullable=True)
+    normalized_insurance_cost: Mapped[float | None] = mapped_column(Numeric(18, 6), nullable=True)
+    normalization_fx_rate: Mapped[float | None] = mapped_column(Numeric(18, 10), nullable=True)
+    normalization_rate_date: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    normalization_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    normalized_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     source_upload_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("uploaded_documents.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     items = relationship("InvoiceLineItem", back_populates="invoice")
 
+    @validates("invoice_date")
+    def _parse_invoice_date(self, key: str, value: str | None) -> str | None:
+        self.invoice_date_value = parse_invoice_date(value)
+        return value
+
+    @validates("currency")
+    def _normalize_currency(self, key: str, value: str | None) -> str | None:
+        return currency_code(value)
+
 
 class InvoiceLineItem(Base):
     __tablename__ = "invoice_line_items"
+    __table_args__ = (
+        Index("ix_invoice_line_items_invoice_sort", "invoice_id", "sort_order"),
+        Index(
+            "ix_invoice_line_items_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_invoice_line_items_validated_hs_code",
+            "validated_hs_code",
+            "invoice_id",
+            postgresql_ops={"validated_hs_code": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_invoice_line_items_extracted_hs_code",
+            "extracted_hs_code",
+            "invoice_id",
+            postgresql_ops={"extracted_hs_code": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     invoice_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("invoices.id"), nullable=False)
@@ -73,20 +133,34 @@ class InvoiceLineItem(Base):
     validated_hs_code: Mapped[str | None] = mapped_column(String(20))
     hs_confidence: Mapped[float | None] = mapped_column(Numeric(5, 3))
     metadata_jsonb: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    normalized_line_total: Mapped[float | None] = mapped_column(Numeric(18, 6), nullable=True)
+    validation_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
     sort_order: Mapped[int] = mapped_column(Integer, nullable=False)
 
     invoice = relationship("Invoice", back_populates="items")
 
+    @validates("extracted_hs_code", "validated_hs_code")
+    def _normalize_hs_code(self, key: str, value: str | None) -> str | None:
+        return hs_code_digits(value)
+
 
 class ValidationTask(Base):
     __tablename__ = "validation_tasks"
+    __table_args__ = (
+        Index("ix_validation_tasks_invoice_status_created", "invoice_id", "status", "created_at"),
+        Index("ix_validation_tasks_queue", "status", "created_at", "id"),
+        Index("ix_validation_tasks_user_status_created", "user_id", "status", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     invoice_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("invoices.id"), nullable=False)
+    # Denormalized from the invoice so per-user task pages avoid the join.
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     line_item_id: Mapped[uuid.UUID | None] = mapped_column(Uuid(as_uuid=True), ForeignKey("invoice_line_items.id"), nullable=True)
     task_type: Mapped[str] = mapped_column(String(64), nullable=False)
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="OPEN")
     payload_jsonb: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     resolution_jsonb: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    input_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
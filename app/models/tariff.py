@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Integer, Boolean
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TariffCommodity(Base):
+    __tablename__ = "tariff_commodities"
+
+    sid: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    code: Mapped[str] = mapped_column(String(10), index=True, nullable=False)
+    producline_suffix: Mapped[str] = mapped_column(String(2), default="80", nullable=False)
+    description: Mapped[str | None] = mapped_column(String(2048), nullable=True)
+    parent_sid: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    number_indents: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    leaf: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    heading: Mapped[str] = mapped_column(String(4), index=True, nullable=False)
+    synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
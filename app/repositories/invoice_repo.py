@@ -1,8 +1,96 @@
+from datetime import date
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_, exists, or_
+from sqlalchemy.orm.util import identity_key
 
+from app.core.normalize import currency_code, hs_code_digits
+from app.core.pagination import apply_keyset
 from app.models import Invoice, InvoiceLineItem, ValidationTask
 
+INVOICE_DETAIL_FIELDS = (
+    "id",
+    "supplier_name",
+    "invoice_number",
+    "invoice_date",
+    "due_date",
+    "incoterm",
+    "currency",
+    "total_value",
+    "freight_cost",
+    "insurance_cost",
+    "created_at",
+)
+LINE_ITEM_DETAIL_FIELDS = (
+    "id",
+    "description",
+    "sku",
+    "quantity",
+    "unit_price",
+    "line_total",
+    "extracted_hs_code",
+    "validated_hs_code",
+    "hs_confidence",
+    "sort_order",
+)
+
+
+def _contains(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def invoice_search_filters(
+    user_id,
+    supplier: str | None = None,
+    number: str | None = None,
+    currency: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_total=None,
+    max_total=None,
+    hs_code: str | None = None,
+    q: str | None = None,
+) -> list:
+    # Substring matches are ILIKE so Postgres can serve them from the pg_trgm
+    # GIN indexes; HS codes are prefix matches on the text_pattern_ops indexes.
+    filters = [Invoice.user_id == user_id]
+    if supplier:
+        filters.append(Invoice.supplier_name.ilike(_contains(supplier), escape="\\"))
+    if number:
+        filters.append(Invoice.invoice_number.ilike(_contains(number), escape="\\"))
+    if currency:
+        filters.append(Invoice.currency == currency_code(currency))
+    if date_from:
+        filters.append(Invoice.invoice_date_value >= date_from)
+    if date_to:
+        filters.append(Invoice.invoice_date_value <= date_to)
+    if min_total is not None:
+        filters.append(Invoice.total_value >= min_total)
+    if max_total is not None:
+        filters.append(Invoice.total_value <= max_total)
+    if hs_code:
+        digits = hs_code_digits(hs_code) or ""
+        if len(digits) < 2:
+            raise ValueError("hs_code must contain at least two digits")
+        prefix = digits + "%"
+        filters.append(
+            exists().where(
+                InvoiceLineItem.invoice_id == Invoice.id,
+                or_(InvoiceLineItem.validated_hs_code.like(prefix), InvoiceLineItem.extracted_hs_code.like(prefix)),
+            )
+        )
+    if q:
+        pattern = _contains(q)
+        filters.append(
+            or_(
+                Invoice.supplier_name.ilike(pattern, escape="\\"),
+                Invoice.invoice_number.ilike(pattern, escape="\\"),
+                exists().where(InvoiceLineItem.invoice_id == Invoice.id, InvoiceLineItem.description.ilike(pattern, escape="\\")),
+            )
+        )
+    return filters
+
 
 class InvoiceRepository:
     def __init__(self, db: AsyncSession):
@@ -12,18 +100,120 @@ class InvoiceRepository:
         result = await self.db.execute(select(Invoice).where(Invoice.id == invoice_id))
         return result.scalar_one_or_none()
 
+    async def get_owned_invoice(self, invoice_id, user_id):
+        invoice = self.db.identity_map.get(identity_key(Invoice, invoice_id))
+        if invoice is None:
+            result = await self.db.execute(select(Invoice).where(Invoice.id == invoice_id, Invoice.user_id == user_id))
+            invoice = result.scalar_one_or_none()
+        if invoice is None or invoice.user_id != user_id:
+            return None
+        return invoice
+
+    async def get_owned_line(self, invoice_id, line_item_id, user_id, open_task_type: str | None = None):
+        # Invoice, line and the line's open task of the given type come back in
+        # one round trip, with ownership enforced in SQL.
+        task_join = and_(
+            ValidationTask.line_item_id == InvoiceLineItem.id,
+            ValidationTask.task_type == open_task_type,
+            ValidationTask.status == "OPEN",
+        )
+        stmt = (
+            select(Invoice, InvoiceLineItem, ValidationTask)
+            .join(InvoiceLineItem, InvoiceLineItem.invoice_id == Invoice.id)
+            .outerjoin(ValidationTask, task_join)
+            .where(Invoice.id == invoice_id, Invoice.user_id == user_id, InvoiceLineItem.id == line_item_id)
+            .order_by(ValidationTask.created_at.asc())
+            .limit(1)
+        )
+        row = (await self.db.execute(stmt)).first()
+        if row is None:
+            return None, None, None
+        return row[0], row[1], row[2]
+
+    async def get_invoice_detail(self, invoice_id, user_id) -> dict | None:
+        # One joined, column-projected query; rows become plain dicts without
+        # building ORM objects for the invoice or its items.
+        stmt = (
+            select(
+                *(getattr(Invoice, field) for field in INVOICE_DETAIL_FIELDS),
+                *(getattr(InvoiceLineItem, field).label(f"item_{field}") for field in LINE_ITEM_DETAIL_FIELDS),
+            )
+            .outerjoin(InvoiceLineItem, InvoiceLineItem.invoice_id == Invoice.id)
+            .where(Invoice.id == invoice_id, Invoice.user_id == user_id)
+            .order_by(InvoiceLineItem.sort_order)
+        )
+        rows = (await self.db.execute(stmt)).mappings().all()
+        if not rows:
+            return None
+        detail = {field: rows[0][field] for field in INVOICE_DETAIL_FIELDS}
+        detail["items"] = [
+            {field: row[f"item_{field}"] for field in LINE_ITEM_DETAIL_FIELDS}
+            for row in rows
+            if row["item_id"] is not None
+        ]
+        return detail
+
+    async def stream_export_rows(self, filters: list, chunk_size: int = 1000):
+        # Same flat projection as the detail view, ordered so an invoice's rows
+        # are adjacent. yield_per keeps a server-side cursor open and hands
+        # back one partition at a time instead of buffering the result.
+        stmt = (
+            select(
+                *(getattr(Invoice, field) for field in INVOICE_DETAIL_FIELDS),
+                *(getattr(InvoiceLineItem, field).label(f"item_{field}") for field in LINE_ITEM_DETAIL_FIELDS),
+            )
+            .outerjoin(InvoiceLineItem, InvoiceLineItem.invoice_id == Invoice.id)
+            .where(*filters)
+            .order_by(Invoice.created_at, Invoice.id, InvoiceLineItem.sort_order)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.db.stream(stmt)
+        try:
+            async for partition in result.mappings().partitions():
+                yield partition
+        finally:
+            await result.close()
+
     async def list_line_items(self, invoice_id):
         result = await self.db.execute(
             select(InvoiceLineItem).where(InvoiceLineItem.invoice_id == invoice_id).order_by(InvoiceLineItem.sort_order)
         )
         return result.scalars().all()
 
+    async def iter_invoice_batches(self, filters: list, batch_size: int = 500):
+        last_id = None
+        while True:
+            stmt = select(Invoice).where(*filters).order_by(Invoice.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(Invoice.id > last_id)
+            invoices = (await self.db.execute(stmt)).scalars().all()
+            if not invoices:
+                return
+            result = await self.db.execute(
+                select(InvoiceLineItem).where(InvoiceLineItem.invoice_id.in_([invoice.id for invoice in invoices]))
+            )
+            items: dict = {}
+            for item in result.scalars().all():
+                items.setdefault(item.invoice_id, []).append(item)
+            yield invoices, items
+            last_id = invoices[-1].id
+
+    async def save(self) -> None:
+        await self.db.commit()
+
+    def release(self) -> None:
+        self.db.expunge_all()
+
     async def create_task(self, task: ValidationTask) -> ValidationTask:
         self.db.add(task)
         await self.db.commit()
         await self.db.refresh(task)
         return task
 
+    def add_task(self, task: ValidationTask) -> ValidationTask:
+        self.db.add(task)
+        return task
+
     async def save_task(self, task: ValidationTask) -> ValidationTask:
         await self.db.commit()
         await self.db.refresh(task)
@@ -38,6 +228,47 @@ class InvoiceRepository:
         )
         return result.scalars().all()
 
+    async def list_tasks(self, invoice_id):
+        result = await self.db.execute(
+            select(ValidationTask).where(ValidationTask.invoice_id == invoice_id).order_by(ValidationTask.created_at.asc())
+        )
+        return result.scalars().all()
+
+    async def list_user_tasks(
+        self,
+        user_id,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        task_type: str | None = None,
+        invoice_id=None,
+    ):
+        stmt = select(ValidationTask).where(ValidationTask.user_id == user_id)
+        if status:
+            stmt = stmt.where(ValidationTask.status == status)
+        if task_type:
+            stmt = stmt.where(ValidationTask.task_type == task_type)
+        if invoice_id is not None:
+            stmt = stmt.where(ValidationTask.invoice_id == invoice_id)
+        stmt = apply_keyset(stmt, ValidationTask.created_at, ValidationTask.id, cursor, limit)
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_owned_tasks(self, task_ids, user_id, status: str | None = None):
+        stmt = (
+            select(ValidationTask)
+            .join(Invoice, Invoice.id == ValidationTask.invoice_id)
+            .where(ValidationTask.id.in_(task_ids), Invoice.user_id == user_id)
+        )
+        if status:
+            stmt = stmt.where(ValidationTask.status == status)
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_line_items(self, line_item_ids):
+        result = await self.db.execute(select(InvoiceLineItem).where(InvoiceLineItem.id.in_(line_item_ids)))
+        return result.scalars().all()
+
     async def get_task(self, task_id):
         result = await self.db.execute(select(ValidationTask).where(ValidationTask.id == task_id))
         return result.scalar_one_or_none()
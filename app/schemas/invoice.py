@@ -109,6 +109,7 @@ class InvoiceOut(BaseModel):
 
 class ListResponse(BaseModel):
     items: list[Any]
-    total: int
+    total: int | None = None
     limit: int
-    offset: int
+    offset: int = 0
+    next_cursor: str | None = None
@@ -15,5 +15,19 @@ class ValidationTaskOut(BaseModel):
     resolved_at: datetime | None = None
 
 
+class ValidationTaskPage(BaseModel):
+    items: list[ValidationTaskOut]
+    next_cursor: str | None = None
+
+
 class ValidationResolveRequest(BaseModel):
     resolution: dict
+
+
+class BulkResolveItem(BaseModel):
+    task_id: UUID
+    resolution: dict
+
+
+class ValidationBulkResolveRequest(BaseModel):
+    resolutions: list[BulkResolveItem]
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any
+
+from app.models import Invoice, InvoiceLineItem
+from app.integrations.tariff import TariffClient, all_ad_valorem
+from app.services.invoice_validation_service import INCOTERM_SAFE
+
+CENT = Decimal("0.01")
+
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _line_value(item: InvoiceLineItem) -> Decimal:
+    if item.line_total is not None:
+        return Decimal(str(item.line_total))
+    return Decimal(str(item.quantity or 0)) * Decimal(str(item.unit_price or 0))
+
+
+class DutyCalculator:
+    def __init__(self, tariff: TariffClient):
+        self.tariff = tariff
+
+    async def load_measures(
+        self, codes: set[str], country_of_origin: str | None, on_date: date | None
+    ) -> dict[str, dict | None]:
+        ordered = sorted(codes)
+        fetched = await asyncio.gather(
+            *(self.tariff.measures(code, country_of_origin, on_date) for code in ordered),
+            return_exceptions=True,
+        )
+        return {code: None if isinstance(result, Exception) else result for code, result in zip(ordered, fetched)}
+
+    async def calculate(
+        self,
+        invoice: Invoice,
+        items: list[InvoiceLineItem],
+        country_of_origin: str | None = None,
+        on_date: date | None = None,
+    ) -> dict[str, Any]:
+        incoterm = (invoice.incoterm or "").upper()
+        uplift = Decimal("0")
+        if incoterm not in INCOTERM_SAFE:
+            if invoice.freight_cost is None or invoice.insurance_cost is None:
+                raise ValueError("freight_cost and insurance_cost are required to calculate duty")
+            uplift = Decimal(str(invoice.freight_cost)) + Decimal(str(invoice.insurance_cost))
+
+        origin = (country_of_origin or "").upper() or None
+        codes = {item.validated_hs_code or item.extracted_hs_code for item in items}
+        codes.discard(None)
+        measures = await self.load_measures(codes, origin, on_date)
+
+        values = [_line_value(item) for item in items]
+        goods_value = sum(values, Decimal("0"))
+        lines = []
+        totals = {"customs_value": Decimal("0"), "duty": Decimal("0"), "vat": Decimal("0")}
+        complete = True
+        for item, value in zip(items, values):
+            code = item.validated_hs_code or item.extracted_hs_code
+            share = value / goods_value if goods_value else Decimal("0")
+            customs_value = _money(value + uplift * share)
+            line: dict[str, Any] = {
+                "line_item_id": str(item.id),
+                "hs_code": code,
+                "customs_value": float(customs_value),
+            }
+            measure = measures.get(code) if code else None
+            if measure is None:
+                line["error"] = "hs code missing" if not code else "measures unavailable"
+                complete = False
+                lines.append(line)
+                continue
+
+            # Preferential rates only count when the measures were filtered
+            # for the declared origin; otherwise they belong to some other country.
+            duty_rate = measure["third_country_duty"]
+            preference = measure["preferential_duty"] if origin and measure.get("country_of_origin") == origin else None
+            preference_applied = preference is not None and (duty_rate is None or preference < duty_rate)
+            if preference_applied:
+                duty_rate = preference
+            expressions = measure["preferential_expressions" if preference_applied else "third_country_expressions"]
+            if duty_rate is None or not all_ad_valorem(expressions):
+                line["error"] = "non ad valorem duty"
+                line["duty_expressions"] = expressions
+                complete = False
+                lines.append(line)
+                continue
+
+            duty = _money(customs_value * duty_rate / 100)
+            vat_rate = measure["vat"] or Decimal("0")
+            vat = _money((customs_value + duty) * vat_rate / 100)
+            line.update(
+                {
+                    "duty_rate": float(duty_rate),
+                    "preference_applied": preference_applied,
+                    "duty": float(duty),
+                    "vat_rate": float(vat_rate),
+                    "vat": float(vat),
+                }
+            )
+            totals["customs_value"] += customs_value
+            totals["duty"] += duty
+            totals["vat"] += vat
+            lines.append(line)
+
+        return {
+            "invoice_id": str(invoice.id),
+            "currency": invoice.currency,
+            "country_of_origin": country_of_origin,
+            "complete": complete,
+            "totals": {key: float(value) for key, value in totals.items()},
+            "lines": lines,
+        }
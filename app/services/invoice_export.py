@@ -0,0 +1,195 @@
+import csv
+import io
+import logging
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable
+
+from sqlalchemy import DateTime, Integer, Numeric
+
+from app.core.responses import dumps
+from app.models import Invoice, InvoiceLineItem
+from app.repositories.invoice_repo import INVOICE_DETAIL_FIELDS, LINE_ITEM_DETAIL_FIELDS
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+    parquet = None
+
+logger = logging.getLogger("uvicorn.error")
+
+ITEM_COLUMNS = tuple(f"item_{field}" for field in LINE_ITEM_DETAIL_FIELDS)
+EXPORT_COLUMNS = INVOICE_DETAIL_FIELDS + ITEM_COLUMNS
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+Partitions = AsyncIterator[Iterable[Any]]
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(partitions: Partitions) -> AsyncIterator[str]:
+    # One row per line item with the invoice columns repeated; invoices
+    # without items still get a single row with empty item columns.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in partitions:
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def ndjson_chunks(partitions: Partitions) -> AsyncIterator[bytes]:
+    # One nested object per invoice. Rows arrive grouped by invoice, so only
+    # the invoice currently being assembled is held in memory.
+    current: dict | None = None
+    async for rows in partitions:
+        lines = []
+        for row in rows:
+            if current is None or current["id"] != row["id"]:
+                if current is not None:
+                    lines.append(dumps(current) + b"\n")
+                current = {field: row[field] for field in INVOICE_DETAIL_FIELDS}
+                current["items"] = []
+            if row["item_id"] is not None:
+                current["items"].append({field: row[f"item_{field}"] for field in LINE_ITEM_DETAIL_FIELDS})
+        if lines:
+            yield b"".join(lines)
+    if current is not None:
+        yield dumps(current) + b"\n"
+
+
+class _DrainableSink:
+    # Write-only file object for ParquetWriter. Completed row groups are
+    # drained after every partition while tell() keeps the absolute offset
+    # the footer needs.
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        return None
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _model_column(column: str):
+    if column.startswith("item_"):
+        return InvoiceLineItem.__table__.c[column[len("item_"):]]
+    return Invoice.__table__.c[column]
+
+
+def _arrow_type(sql_type):
+    # Derived from the model so decimal precision always matches what the
+    # database can return.
+    if isinstance(sql_type, Numeric) and sql_type.precision is not None:
+        return pyarrow.decimal128(sql_type.precision, sql_type.scale or 0)
+    if isinstance(sql_type, Numeric):
+        return pyarrow.float64()
+    if isinstance(sql_type, Integer):
+        return pyarrow.int64()
+    if isinstance(sql_type, DateTime):
+        return pyarrow.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    return pyarrow.string()
+
+
+def _parquet_schema():
+    return pyarrow.schema([(column, _arrow_type(_model_column(column).type)) for column in EXPORT_COLUMNS])
+
+
+def _arrow_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+async def parquet_chunks(partitions: Partitions) -> AsyncIterator[bytes]:
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = _parquet_schema()
+    sink = _DrainableSink()
+    writer = parquet.ParquetWriter(sink, schema)
+    try:
+        async for rows in partitions:
+            columns: dict[str, list] = {column: [] for column in EXPORT_COLUMNS}
+            for row in rows:
+                for column in EXPORT_COLUMNS:
+                    columns[column].append(_arrow_value(row[column]))
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+EXPORT_WRITERS = {"csv": csv_chunks, "ndjson": ndjson_chunks, "parquet": parquet_chunks}
+
+
+async def start_export(export_format: str, partitions: Partitions) -> AsyncIterator:
+    # Produces the first chunk before the response starts, so a query or
+    # writer error on the first partition can still become an error status.
+    # Failures after that can only truncate the body; they are logged.
+    chunks = EXPORT_WRITERS[export_format](partitions)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception:
+        logger.exception("Invoice export failed format=%s", export_format)
+        raise
+
+    async def _stream():
+        if first is not None:
+            yield first
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception:
+            logger.exception("Invoice export failed mid-stream format=%s", export_format)
+            raise
+
+    return _stream()
+
+
+def available_formats() -> list[str]:
+    return [name for name in EXPORT_WRITERS if name != "parquet" or pyarrow is not None]
@@ -1,110 +1,134 @@
-from datetime import datetime
+import hashlib
+import logging
+from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Any
 
+import httpx
+
+from app.core.normalize import parse_invoice_date
 from app.models import Invoice, InvoiceLineItem, ValidationTask
 from app.repositories.invoice_repo import InvoiceRepository
 from app.integrations.tariff import TariffClient
-from app.integrations.fx import FXClient
+from app.integrations.fx import FXRateStore
+from app.services.invoice_validator import rules
+
+logger = logging.getLogger("uvicorn.error")
 
-INCOTERM_FREIGHT = {"EXW", "FOB"}
 INCOTERM_SAFE = {"CIF", "DDP"}
+UPSTREAM_ERRORS = (httpx.HTTPError, ValueError)
+
+
+def invoice_fx_date(value: str | None) -> date | None:
+    # A missing date converts at the latest rate; a date that is present but
+    # unreadable must not, or the invoice is silently priced at today's rate.
+    day = parse_invoice_date(value)
+    if day is None and value and value.strip():
+        raise ValueError("invoice_date unparseable")
+    return day
 
 
 class InvoiceValidationService:
-    def __init__(self, repo: InvoiceRepository, tariff: TariffClient, fx: FXClient):
+    def __init__(self, repo: InvoiceRepository, tariff: TariffClient, fx: FXRateStore):
         self.repo = repo
         self.tariff = tariff
         self.fx = fx
 
     async def validate_invoice(self, invoice: Invoice) -> dict:
-        tasks = []
-        existing = await self.repo.list_open_tasks(invoice.id)
-        if existing:
-            return {
-                "invoice_id": str(invoice.id),
-                "status": "needs_user_input",
-                "tasks": existing,
-                "computed_suggestions": {},
-            }
-        computed = {}
+        existing = await self.repo.list_tasks(invoice.id)
+        latest = {(task.line_item_id, task.task_type): task for task in existing}
 
-        incoterm = (invoice.incoterm or "").upper()
-        if incoterm in INCOTERM_FREIGHT and (invoice.freight_cost is None or invoice.insurance_cost is None):
-            task = ValidationTask(
-                invoice_id=invoice.id,
-                task_type="FREIGHT_REQUIRED",
-                status="OPEN",
-                payload_jsonb={
-                    "message": "Shipping costs not included. Please enter estimated Freight & Insurance costs to calculate Duty.",
-                    "need_freight": invoice.freight_cost is None,
-                    "need_insurance": invoice.insurance_cost is None,
-                },
-            )
-            tasks.append(await self.repo.create_task(task))
+        wanted: dict[tuple, tuple[str, dict]] = {}
+        invoice_fingerprint = invoice_inputs_fingerprint(invoice)
+        for finding in rules.compile("tasks").evaluate(invoice, []):
+            wanted[(None, finding["task_type"])] = (invoice_fingerprint, finding["payload"])
+
+        unchanged_lines = set()
+        revalidated = 0
+        line_items = await self.repo.list_line_items(invoice.id)
+        for item in line_items:
+            fingerprint = line_fingerprint(item)
+            if item.validation_fingerprint == fingerprint:
+                unchanged_lines.add(item.id)
+                continue
+            revalidated += 1
+            line_task = await self._line_task(item)
+            if line_task is None:
+                item.validation_fingerprint = fingerprint
+                continue
+            task_type, payload, complete = line_task
+            # A failed tariff lookup leaves the line unfingerprinted
+            # (and its task without a fingerprint) so the next run retries it.
+            wanted[(item.id, task_type)] = (fingerprint if complete else None, payload)
+            if complete:
+                item.validation_fingerprint = fingerprint
+
+        open_tasks = []
+        for task in existing:
+            if task.status != "OPEN":
+                continue
+            key = (task.line_item_id, task.task_type)
+            if task.line_item_id in unchanged_lines:
+                open_tasks.append(task)
+            elif key in wanted:
+                fingerprint, payload = wanted.pop(key)
+                if task.input_fingerprint != fingerprint:
+                    task.payload_jsonb = payload
+                    task.input_fingerprint = fingerprint
+                open_tasks.append(task)
+            else:
+                task.status = "CLOSED"
+                task.resolution_jsonb = {"reason": "inputs changed"}
+                task.resolved_at = datetime.utcnow()
 
-        if invoice.insurance_cost is None:
+        for (line_item_id, task_type), (fingerprint, payload) in wanted.items():
+            previous = latest.get((line_item_id, task_type))
+            if previous is not None and previous.status == "RESOLVED" and previous.input_fingerprint == fingerprint:
+                continue
             task = ValidationTask(
                 invoice_id=invoice.id,
-                task_type="INSURANCE_REQUIRED",
+                user_id=invoice.user_id,
+                line_item_id=line_item_id,
+                task_type=task_type,
                 status="OPEN",
-                payload_jsonb={
-                    "options": [
-                        {"type": "manual", "label": "Enter manually"},
-                        {
-                            "type": "estimate",
-                            "label": "Estimate conservative insurance rate",
-                            "formula": "insurance = invoice_value * 0.005",
-                        },
-                    ],
-                    "default_estimate_rate": 0.005,
-                },
+                payload_jsonb=payload,
+                input_fingerprint=fingerprint,
             )
-            tasks.append(await self.repo.create_task(task))
-            if invoice.total_value is not None:
-                computed["insurance_estimate"] = float(Decimal(invoice.total_value) * Decimal("0.005"))
-
-        line_items = await self.repo.list_line_items(invoice.id)
-        for item in line_items:
-            if not item.extracted_hs_code:
-                suggestions = []
-                try:
-                    suggestions = await self.tariff.search(item.description, limit=5)
-                except Exception:
-                    suggestions = []
-                task = ValidationTask(
-                    invoice_id=invoice.id,
-                    line_item_id=item.id,
-                    task_type="HS_CODE_MISSING",
-                    status="OPEN",
-                    payload_jsonb={
-                        "line_item_id": str(item.id),
-                        "description": item.description,
-                        "search_suggestions": suggestions,
-                    },
-                )
-                tasks.append(await self.repo.create_task(task))
-            else:
-                task = ValidationTask(
-                    invoice_id=invoice.id,
-                    line_item_id=item.id,
-                    task_type="HS_CODE_REFINEMENT",
-                    status="OPEN",
-                    payload_jsonb={
-                        "line_item_id": str(item.id),
-                        "parent_code": item.extracted_hs_code,
-                        "question": "Select a more specific 10-digit code if available",
-                    },
-                )
-                tasks.append(await self.repo.create_task(task))
+            open_tasks.append(self.repo.add_task(task))
+        await self.repo.save()
 
-        status = "ready" if not tasks else "needs_user_input"
+        computed = {}
+        if invoice.insurance_cost is None and invoice.total_value is not None:
+            computed["insurance_estimate"] = float(Decimal(invoice.total_value) * Decimal("0.005"))
         return {
             "invoice_id": str(invoice.id),
-            "status": status,
-            "tasks": tasks,
+            "status": "ready" if not open_tasks else "needs_user_input",
+            "tasks": open_tasks,
             "computed_suggestions": computed,
+            "revalidated_lines": revalidated,
+        }
+
+    async def _line_task(self, item: InvoiceLineItem) -> tuple[str, dict, bool] | None:
+        if item.validated_hs_code:
+            return None
+        if not item.extracted_hs_code:
+            try:
+                suggestions = await self.tariff.search(item.description, limit=5)
+            except UPSTREAM_ERRORS:
+                suggestions = None
+            payload = {
+                "line_item_id": str(item.id),
+                "description": item.description,
+                "search_suggestions": suggestions or [],
+            }
+            return "HS_CODE_MISSING", payload, suggestions is not None
+        payload = {
+            "line_item_id": str(item.id),
+            "parent_code": item.extracted_hs_code,
+            "question": "Select a more specific 10-digit code if available",
+            "candidate_codes": self.tariff.candidate_codes(item.extracted_hs_code),
         }
+        return "HS_CODE_REFINEMENT", payload, True
 
     async def resolve_task(self, task: ValidationTask, resolution: dict) -> ValidationTask:
         task.resolution_jsonb = resolution
@@ -115,24 +139,147 @@ class InvoiceValidationService:
     async def normalize_currency(self, invoice: Invoice, target_currency: str) -> dict:
         if not invoice.currency:
             raise ValueError("invoice currency missing")
-        quote = await self.fx.quote(invoice.currency, target_currency, float(invoice.total_value or 0))
-        rate = quote.get("rate") or quote.get("fx_rate") or quote.get("price")
-        if not rate:
-            raise ValueError("fx rate unavailable")
-        rate = Decimal(str(rate))
-
-        def _convert(value: float | None) -> float | None:
-            if value is None:
-                return None
-            return float((Decimal(str(value)) * rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-
-        normalized = {
-            "normalized_currency": target_currency,
-            "fx_rate": float(rate),
-            "normalized_totals": {
-                "total_value": _convert(invoice.total_value),
-                "freight_cost": _convert(invoice.freight_cost),
-                "insurance_cost": _convert(invoice.insurance_cost),
-            },
-        }
+        rate, rate_date = await self.fx.rate_on(invoice.currency, target_currency, invoice_fx_date(invoice.invoice_date))
+        items = await self.repo.list_line_items(invoice.id)
+        recomputed = apply_normalization(invoice, items, target_currency, rate, rate_date)
+        if recomputed:
+            await self.repo.save()
+        normalized = normalized_totals(invoice, target_currency, rate, rate_date)
+        normalized["recomputed"] = recomputed
         return normalized
+
+    async def persist_normalization(self, batches, rates: dict, target_currency: str) -> dict:
+        summary = {"updated": 0, "unchanged": 0, "failed": 0}
+        async for invoices, items in batches:
+            for invoice in invoices:
+                rate = rates.get((invoice.currency, invoice.invoice_date))
+                if rate is None:
+                    summary["failed"] += 1
+                elif apply_normalization(invoice, items.get(invoice.id, []), target_currency, *rate):
+                    summary["updated"] += 1
+                else:
+                    summary["unchanged"] += 1
+            await self.repo.save()
+            self.repo.release()
+        return summary
+
+    async def group_rates(
+        self, groups: list[tuple[str, str | None]], target_currency: str
+    ) -> dict[tuple[str, str | None], tuple[Decimal, str | None] | None]:
+        dated: dict[str, list[date]] = {}
+        for currency, invoice_date in groups:
+            day = parse_invoice_date(invoice_date)
+            if day is not None and day < date.today():
+                dated.setdefault(currency.upper(), []).append(day)
+        unavailable: set[str] = set()
+        for currency, days in dated.items():
+            if currency == target_currency.upper():
+                continue
+            try:
+                await self.fx.backfill(currency, min(days), max(days))
+            except UPSTREAM_ERRORS:
+                logger.warning("FX backfill failed base=%s", currency, exc_info=True)
+                unavailable.add(currency)
+
+        rates: dict[tuple[str, str | None], tuple[Decimal, str | None] | None] = {}
+        for currency, invoice_date in groups:
+            if currency.upper() in unavailable:
+                rates[(currency, invoice_date)] = None
+                continue
+            try:
+                rates[(currency, invoice_date)] = await self.fx.rate_on(
+                    currency, target_currency, invoice_fx_date(invoice_date)
+                )
+            except UPSTREAM_ERRORS:
+                rates[(currency, invoice_date)] = None
+        return rates
+
+
+def convert_decimal(value: Any, rate: Decimal) -> Decimal | None:
+    if value is None:
+        return None
+    return (Decimal(str(value)) * rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def convert_amount(value: Any, rate: Decimal) -> float | None:
+    converted = convert_decimal(value, rate)
+    return float(converted) if converted is not None else None
+
+
+def normalized_totals(invoice: Any, target_currency: str, rate: Decimal, rate_date: str | None) -> dict:
+    return {
+        "normalized_currency": target_currency,
+        "fx_rate": float(rate),
+        "fx_rate_date": rate_date,
+        "normalized_totals": {
+            "total_value": convert_amount(invoice.total_value, rate),
+            "freight_cost": convert_amount(invoice.freight_cost, rate),
+            "insurance_cost": convert_amount(invoice.insurance_cost, rate),
+        },
+    }
+
+
+def _canonical(value: Any) -> str:
+    if value is None:
+        return ""
+    return format(Decimal(str(value)).normalize(), "f")
+
+
+def _fingerprint(parts: list[str]) -> str:
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def invoice_inputs_fingerprint(invoice: Invoice) -> str:
+    return _fingerprint(
+        [
+            (invoice.incoterm or "").upper(),
+            _canonical(invoice.total_value),
+            _canonical(invoice.freight_cost),
+            _canonical(invoice.insurance_cost),
+        ]
+    )
+
+
+def line_fingerprint(item: InvoiceLineItem) -> str:
+    return _fingerprint(
+        [
+            item.description or "",
+            item.extracted_hs_code or "",
+            item.validated_hs_code or "",
+        ]
+    )
+
+
+def normalization_fingerprint(
+    invoice: Invoice, items: list[InvoiceLineItem], target_currency: str, rate: Decimal, rate_date: str | None
+) -> str:
+    parts = [
+        invoice.currency.upper(),
+        target_currency.upper(),
+        _canonical(rate),
+        rate_date or "",
+        _canonical(invoice.total_value),
+        _canonical(invoice.freight_cost),
+        _canonical(invoice.insurance_cost),
+    ]
+    parts.extend(f"{item.id}:{_canonical(item.line_total)}" for item in sorted(items, key=lambda item: str(item.id)))
+    return _fingerprint(parts)
+
+
+def apply_normalization(
+    invoice: Invoice, items: list[InvoiceLineItem], target_currency: str, rate: Decimal, rate_date: str | None
+) -> bool:
+    fingerprint = normalization_fingerprint(invoice, items, target_currency, rate, rate_date)
+    if invoice.normalization_fingerprint == fingerprint:
+        return False
+    invoice.normalized_currency = target_currency.upper()
+    invoice.normalized_total_value = convert_decimal(invoice.total_value, rate)
+    invoice.normalized_freight_cost = convert_decimal(invoice.freight_cost, rate)
+    invoice.normalized_insurance_cost = convert_decimal(invoice.insurance_cost, rate)
+    invoice.normalization_fx_rate = rate
+    invoice.normalization_rate_date = rate_date
+    invoice.normalization_fingerprint = fingerprint
+    invoice.normalized_at = datetime.utcnow()
+    for item in items:
+        item.normalized_line_total = convert_decimal(item.line_total, rate)
+    return True
@@ -1,43 +1,297 @@
-from typing import Tuple
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP
+from typing import Any, Callable, Tuple
 
+INVOICE = "invoice"
+LINE = "line"
+FINALIZE = "finalize"
+INCOTERM_FREIGHT = {"EXW", "FOB"}
+CENT = Decimal("0.01")
+HALF_CENT = Decimal("0.005")
+ROUNDING_POLICIES = {"half-up": ROUND_HALF_UP, "half-even": ROUND_HALF_EVEN, "truncation": ROUND_DOWN}
 
-def validate_required_fields(payload: dict) -> list[str]:
-    errors = []
-    if not payload.get("currency"):
-        errors.append("currency required")
-    if not payload.get("invoice_date"):
-        errors.append("invoice_date required")
-    line_items = payload.get("line_items") or []
-    if not line_items:
-        errors.append("at least one line item required")
-    return errors
 
+def _field(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+class Rule:
+    def __init__(self, name: str, scope: str, check: Callable, rulesets: tuple[str, ...]):
+        self.name = name
+        self.scope = scope
+        self.check = check
+        self.rulesets = rulesets
+
+
+class RuleRegistry:
+    def __init__(self):
+        self.rules: list[Rule] = []
+        self._compiled: dict[str, "CompiledRules"] = {}
+
+    def register(self, name: str, scope: str, rulesets: tuple[str, ...] = ("confirm",)) -> Callable:
+        def decorator(check: Callable) -> Callable:
+            self.rules.append(Rule(name, scope, check, rulesets))
+            self._compiled.clear()
+            return check
+
+        return decorator
+
+    def compile(self, ruleset: str) -> "CompiledRules":
+        compiled = self._compiled.get(ruleset)
+        if compiled is None:
+            compiled = CompiledRules([rule for rule in self.rules if ruleset in rule.rulesets])
+            self._compiled[ruleset] = compiled
+        return compiled
+
+
+class CompiledRules:
+    # Line rules are flattened into one tuple so the engine walks the line
+    # items exactly once however many rules are registered.
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self.invoice_rules = tuple((rule.name, rule.check) for rule in rules if rule.scope == INVOICE)
+        self.line_rules = tuple((rule.name, rule.check) for rule in rules if rule.scope == LINE)
+        self.finalizers = tuple((rule.name, rule.check) for rule in rules if rule.scope == FINALIZE)
+        self.timings: dict[str, list[float]] = {rule.name: [0, 0.0] for rule in rules}
+
+    def evaluate(self, invoice: Any, line_items: list | None = None) -> list[dict]:
+        if line_items is None:
+            line_items = _field(invoice, "line_items") or []
+        state: dict[str, Any] = {"line_count": len(line_items)}
+        findings: list[dict] = []
+        elapsed = dict.fromkeys(self.timings, 0.0)
+        clock = time.perf_counter
+
+        for name, check in self.invoice_rules:
+            started = clock()
+            findings.extend(_tag(name, check(invoice, state)))
+            elapsed[name] += clock() - started
+
+        for index, item in enumerate(line_items):
+            for name, check in self.line_rules:
+                started = clock()
+                findings.extend(_tag(name, check(index, item, state)))
+                elapsed[name] += clock() - started
+
+        for name, check in self.finalizers:
+            started = clock()
+            findings.extend(_tag(name, check(invoice, state)))
+            elapsed[name] += clock() - started
+
+        for name, seconds in elapsed.items():
+            self.timings[name][0] += 1
+            self.timings[name][1] += seconds
+        return findings
+
+    def stats(self) -> list[dict]:
+        rows = [
+            {"rule": name, "evaluations": int(calls), "total_ms": round(seconds * 1000, 3)}
+            for name, (calls, seconds) in self.timings.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def _tag(name: str, results: list[dict] | None) -> list[dict]:
+    if not results:
+        return []
+    for finding in results:
+        finding.setdefault("rule", name)
+    return results
+
+
+rules = RuleRegistry()
+
+
+@rules.register("required_fields", INVOICE)
+def _required_fields(invoice: Any, state: dict) -> list[dict]:
+    findings = []
+    if not _field(invoice, "currency"):
+        findings.append({"message": "currency required"})
+    if not _field(invoice, "invoice_date"):
+        findings.append({"message": "invoice_date required"})
+    if not state["line_count"]:
+        findings.append({"message": "at least one line item required"})
+    return findings
 
-def reconcile_totals(payload: dict, tolerance: float = 0.01) -> Tuple[bool, str | None]:
-    line_items = payload.get("line_items") or []
-    if not line_items:
-        return True, None
 
-    line_total_sum = 0.0
-    for item in line_items:
-        line_total = item.get("line_total")
+@rules.register("non_negative_quantity", LINE)
+def _non_negative_quantity(index: int, item: Any, state: dict) -> list[dict] | None:
+    qty = _field(item, "quantity")
+    if qty is not None and qty < 0:
+        return [{"message": f"line_items[{index}].quantity must be >= 0"}]
+    return None
+
+
+def _decimal(value: Any) -> Decimal | None:
+    if value is None:
+        return None
+    return Decimal(str(value))
+
+
+class TotalsReconciliation:
+    # Sums are kept as exact Decimals per rounding policy so a mismatch can be
+    # traced to how the supplier rounded rather than to float drift.
+    def __init__(self, tolerance: Decimal = CENT, max_line_reports: int = 50):
+        self.tolerance = tolerance
+        self.max_line_reports = max_line_reports
+        self.line_count = 0
+        self.stated = Decimal("0")
+        self.sums = {policy: Decimal("0") for policy in ROUNDING_POLICIES}
+        self.sums["unrounded"] = Decimal("0")
+        self.deviating_lines: list[dict] = []
+        self.deviating_count = 0
+
+    def add(self, index: int, item: Any) -> None:
+        self.line_count += 1
+        line_total = _decimal(_field(item, "line_total"))
+        quantity = _decimal(_field(item, "quantity"))
+        unit_price = _decimal(_field(item, "unit_price"))
+        computed = quantity * unit_price if quantity is not None and unit_price is not None else None
         if line_total is None:
-            qty = item.get("quantity") or 0
-            unit_price = item.get("unit_price") or 0
-            line_total = qty * unit_price
-        line_total_sum += float(line_total)
+            line_total = computed if computed is not None else Decimal("0")
+        self.stated += line_total
+
+        base = computed if computed is not None else line_total
+        self.sums["unrounded"] += base
+        for policy, rounding in ROUNDING_POLICIES.items():
+            self.sums[policy] += base.quantize(CENT, rounding=rounding)
+
+        if computed is None or line_total == computed.quantize(CENT, rounding=ROUND_HALF_UP):
+            return
+        if abs(line_total - computed) <= HALF_CENT:
+            return
+        self.deviating_count += 1
+        if len(self.deviating_lines) < self.max_line_reports:
+            explanation = next(
+                (
+                    f"line_total matches quantity x unit_price with {policy} rounding"
+                    for policy, rounding in ROUNDING_POLICIES.items()
+                    if line_total == computed.quantize(CENT, rounding=rounding)
+                ),
+                "line_total differs from quantity x unit_price",
+            )
+            self.deviating_lines.append(
+                {
+                    "index": index,
+                    "line_total": str(line_total),
+                    "computed": str(computed),
+                    "difference": str(line_total - computed),
+                    "explanation": explanation,
+                }
+            )
+
+    def report(self, total_value: Any) -> dict:
+        total = _decimal(total_value)
+        report: dict[str, Any] = {
+            "ok": True,
+            "line_count": self.line_count,
+            "line_total_sum": str(self.stated),
+            "deviating_line_count": self.deviating_count,
+            "deviating_lines": self.deviating_lines,
+            "explanation": None,
+        }
+        if total is None or not self.line_count:
+            return report
+        difference = total - self.stated
+        report["total_value"] = str(total)
+        report["difference"] = str(difference)
+        if abs(difference) <= self.tolerance:
+            return report
+
+        if abs(total - self.sums["unrounded"].quantize(CENT, rounding=ROUND_HALF_UP)) <= self.tolerance:
+            report["explanation"] = "total_value was computed from unrounded line values"
+            return report
+        for policy in ROUNDING_POLICIES:
+            if abs(total - self.sums[policy]) <= self.tolerance:
+                report["explanation"] = f"total_value matches line totals with {policy} rounding"
+                return report
+        report["ok"] = False
+        return report
+
+
+def reconcile(payload: dict, tolerance: Decimal | float = CENT) -> dict:
+    reconciliation = TotalsReconciliation(tolerance=_decimal(tolerance))
+    for index, item in enumerate(payload.get("line_items") or []):
+        reconciliation.add(index, item)
+    return reconciliation.report(payload.get("total_value"))
+
+
+@rules.register("line_totals", LINE)
+def _accumulate_line_total(index: int, item: Any, state: dict) -> None:
+    if "reconciliation" not in state:
+        state["reconciliation"] = TotalsReconciliation(tolerance=_decimal(state.get("tolerance", CENT)))
+    state["reconciliation"].add(index, item)
 
-    total_value = payload.get("total_value")
-    if total_value is not None and abs(line_total_sum - float(total_value)) > tolerance:
-        return False, "total_value does not match sum of line totals"
 
-    return True, None
+@rules.register("totals_reconciled", FINALIZE)
+def _totals_reconciled(invoice: Any, state: dict) -> list[dict] | None:
+    reconciliation = state.get("reconciliation")
+    if reconciliation is None:
+        return None
+    report = reconciliation.report(_field(invoice, "total_value"))
+    if report["ok"]:
+        return None
+    return [{"message": "total_value does not match sum of line totals", "reconciliation": report}]
+
+
+@rules.register("freight_required", INVOICE, rulesets=("tasks",))
+def _freight_required(invoice: Any, state: dict) -> list[dict] | None:
+    incoterm = (_field(invoice, "incoterm") or "").upper()
+    freight, insurance = _field(invoice, "freight_cost"), _field(invoice, "insurance_cost")
+    if incoterm not in INCOTERM_FREIGHT or (freight is not None and insurance is not None):
+        return None
+    return [
+        {
+            "task_type": "FREIGHT_REQUIRED",
+            "payload": {
+                "message": "Shipping costs not included. Please enter estimated Freight & Insurance costs to calculate Duty.",
+                "need_freight": freight is None,
+                "need_insurance": insurance is None,
+            },
+        }
+    ]
+
+
+@rules.register("insurance_required", INVOICE, rulesets=("tasks",))
+def _insurance_required(invoice: Any, state: dict) -> list[dict] | None:
+    if _field(invoice, "insurance_cost") is not None:
+        return None
+    return [
+        {
+            "task_type": "INSURANCE_REQUIRED",
+            "payload": {
+                "options": [
+                    {"type": "manual", "label": "Enter manually"},
+                    {
+                        "type": "estimate",
+                        "label": "Estimate conservative insurance rate",
+                        "formula": "insurance = invoice_value * 0.005",
+                    },
+                ],
+                "default_estimate_rate": 0.005,
+            },
+        }
+    ]
+
+
+def validate_invoice_payload(payload: dict) -> list[str]:
+    return [finding["message"] for finding in rules.compile("confirm").evaluate(payload)]
+
+
+def validate_required_fields(payload: dict) -> list[str]:
+    return [finding["message"] for finding in _required_fields(payload, {"line_count": len(payload.get("line_items") or [])})]
+
+
+def reconcile_totals(payload: dict, tolerance: float = 0.01) -> Tuple[bool, str | None]:
+    if reconcile(payload, tolerance)["ok"]:
+        return True, None
+    return False, "total_value does not match sum of line totals"
 
 
 def validate_quantities(payload: dict) -> list[str]:
     errors = []
-    for idx, item in enumerate(payload.get("line_items") or []):
-        qty = item.get("quantity")
-        if qty is not None and qty < 0:
-            errors.append(f"line_items[{idx}].quantity must be >= 0")
+    for index, item in enumerate(payload.get("line_items") or []):
+        errors.extend(finding["message"] for finding in _non_negative_quantity(index, item, {}) or [])
     return errors
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+import httpx
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TariffCommodity
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _attributes(item: Any) -> dict:
+    if not isinstance(item, dict):
+        return {}
+    attributes = item.get("attributes")
+    return attributes if isinstance(attributes, dict) else {}
+
+
+def _description(attributes: dict) -> str | None:
+    return attributes.get("description_plain") or attributes.get("description") or attributes.get("formatted_description")
+
+
+def _chapter_key(chapter_code: str) -> str:
+    return chapter_code[:2] + "00"
+
+
+class TariffSyncService:
+    def __init__(
+        self,
+        db: AsyncSession,
+        base_url: str,
+        concurrency: int = 4,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.db = db
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.transport = transport
+
+    async def sync(self, stale_after: timedelta | None = None) -> dict:
+        cutoff = datetime.utcnow() - stale_after if stale_after is not None else None
+        synced_at = await self._synced_headings()
+        stats = {"chapters": 0, "headings": 0, "commodities": 0, "skipped_chapters": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with httpx.AsyncClient(timeout=30, transport=self.transport) as client:
+            chapters = (await self._get(client, "/chapters")).get("data") or []
+            for chapter in chapters:
+                chapter_attrs = _attributes(chapter)
+                chapter_code = chapter_attrs.get("goods_nomenclature_item_id")
+                if not chapter_code:
+                    continue
+                chapter_key = _chapter_key(chapter_code)
+                if cutoff is not None and self._is_fresh(synced_at.get(chapter_key), cutoff):
+                    stats["skipped_chapters"] += 1
+                    continue
+
+                chapter_data = await self._get(client, f"/chapters/{chapter_code[:2]}")
+                headings = [
+                    _attributes(item)
+                    for item in chapter_data.get("included") or []
+                    if isinstance(item, dict) and item.get("type") == "heading"
+                ]
+                heading_codes = [h["goods_nomenclature_item_id"][:4] for h in headings if h.get("goods_nomenclature_item_id")]
+                stale = [
+                    code for code in heading_codes
+                    if cutoff is None or not self._is_fresh(synced_at.get(code), cutoff)
+                ]
+
+                async def _fetch(code: str) -> tuple[str, dict]:
+                    async with semaphore:
+                        return code, await self._get(client, f"/headings/{code}")
+
+                fetched = await asyncio.gather(*(_fetch(code) for code in stale))
+
+                chapter_sid = chapter_attrs.get("goods_nomenclature_sid")
+                await self._replace_group(
+                    chapter_key,
+                    [self._node(chapter_attrs, chapter_key, parent_sid=None, indents=0)],
+                )
+                removed = [code for code in synced_at if code[:2] == chapter_key[:2] and code != chapter_key and code not in heading_codes]
+                if removed:
+                    await self.db.execute(delete(TariffCommodity).where(TariffCommodity.heading.in_(removed)))
+
+                for code, heading_data in fetched:
+                    nodes = self._heading_nodes(code, heading_data, chapter_sid)
+                    await self._replace_group(code, nodes)
+                    stats["headings"] += 1
+                    stats["commodities"] += max(len(nodes) - 1, 0)
+
+                await self.db.commit()
+                stats["chapters"] += 1
+                logger.info("Tariff sync chapter=%s headings=%s", chapter_code[:2], len(fetched))
+
+        return stats
+
+    async def _get(self, client: httpx.AsyncClient, path: str) -> dict:
+        resp = await client.get(f"{self.base_url}{path}")
+        resp.raise_for_status()
+        data = resp.json()
+        return data if isinstance(data, dict) else {}
+
+    async def _synced_headings(self) -> dict[str, datetime]:
+        result = await self.db.execute(
+            select(TariffCommodity.heading, func.min(TariffCommodity.synced_at)).group_by(TariffCommodity.heading)
+        )
+        return {heading: synced for heading, synced in result.all()}
+
+    def _is_fresh(self, synced: datetime | None, cutoff: datetime) -> bool:
+        if synced is None:
+            return False
+        return synced.replace(tzinfo=None) > cutoff
+
+    async def _replace_group(self, heading: str, nodes: list[dict]) -> None:
+        await self.db.execute(delete(TariffCommodity).where(TariffCommodity.heading == heading))
+        now = datetime.utcnow()
+        self.db.add_all(TariffCommodity(**node, synced_at=now) for node in nodes if node["sid"] is not None)
+
+    def _node(self, attributes: dict, heading: str, parent_sid: int | None, indents: int) -> dict:
+        return {
+            "sid": attributes.get("goods_nomenclature_sid"),
+            "code": attributes.get("goods_nomenclature_item_id"),
+            "producline_suffix": attributes.get("producline_suffix") or "80",
+            "description": _description(attributes),
+            "parent_sid": parent_sid,
+            "number_indents": indents,
+            "leaf": bool(attributes.get("leaf", False)),
+            "heading": heading,
+        }
+
+    def _heading_nodes(self, code: str, heading_data: dict, chapter_sid: int | None) -> list[dict]:
+        heading_attrs = _attributes(heading_data.get("data"))
+        heading = self._node(heading_attrs, code, parent_sid=chapter_sid, indents=0)
+        nodes = [heading]
+        stack: list[tuple[int, int | None]] = [(0, heading["sid"])]
+        for item in heading_data.get("included") or []:
+            if not isinstance(item, dict) or item.get("type") != "commodity":
+                continue
+            attrs = _attributes(item)
+            indents = int(attrs.get("number_indents") or 1)
+            while stack and stack[-1][0] >= indents:
+                stack.pop()
+            parent_sid = attrs.get("parent_sid") or (stack[-1][1] if stack else heading["sid"])
+            node = self._node(attrs, code, parent_sid=parent_sid, indents=indents)
+            nodes.append(node)
+            stack.append((indents, node["sid"]))
+        if len(nodes) == 1:
+            heading["leaf"] = True
+        return nodes
+
+
+async def main(full: bool = False) -> None:
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+
+    stale_after = None if full else timedelta(hours=settings.TARIFF_MIRROR_STALE_HOURS)
+    async with SessionLocal() as db:
+        service = TariffSyncService(db, settings.TARIFF_API_BASE_URL, concurrency=settings.TARIFF_SYNC_CONCURRENCY)
+        stats = await service.sync(stale_after=stale_after)
+    logger.info("Tariff sync complete %s", stats)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Sync the local UK Trade Tariff goods nomenclature mirror")
+    parser.add_argument("--full", action="store_true", help="re-download every heading regardless of age")
+    args = parser.parse_args()
+    asyncio.run(main(full=args.full))
@@ -0,0 +1,102 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.integrations.tariff import TariffClient
+from app.models import Invoice, InvoiceLineItem
+from app.services.duty_calculator import DutyCalculator
+
+COMMODITY = {
+    "data": {"type": "commodity", "id": "1"},
+    "included": [
+        {"type": "duty_expression", "id": "103-1", "attributes": {"base": "12.00 %"}},
+        {"type": "duty_expression", "id": "142-1", "attributes": {"base": "4.5%"}},
+        {"type": "duty_expression", "id": "305-1", "attributes": {"base": "20.00 %"}},
+        {"type": "measure", "relationships": {"measure_type": {"data": {"id": "103"}}, "duty_expression": {"data": {"id": "103-1"}}}},
+        {"type": "measure", "relationships": {"measure_type": {"data": {"id": "142"}}, "duty_expression": {"data": {"id": "142-1"}}}},
+        {"type": "measure", "relationships": {"measure_type": {"data": {"id": "305"}}, "duty_expression": {"data": {"id": "305-1"}}}},
+    ],
+}
+
+
+class StubTariffClient(TariffClient):
+    def __init__(self, commodity=COMMODITY):
+        super().__init__("https://tariff.test")
+        self.commodity = commodity
+        self.calls = []
+
+    async def measures(self, code, country_of_origin=None, on_date=None):
+        self.calls.append(code)
+        return self._normalize_measures(code, self.commodity, country_of_origin)
+
+
+@pytest.mark.asyncio
+async def test_duty_shares_measures_and_apportions_freight():
+    tariff = StubTariffClient()
+    measures = await tariff.measures("6109100010")
+    assert measures["third_country_duty"] == Decimal("12.00")
+    assert measures["preferential_duty"] == Decimal("4.5")
+    assert measures["vat"] == Decimal("20.00")
+    tariff.calls.clear()
+
+    invoice = Invoice(id=uuid.uuid4(), currency="GBP", incoterm="FOB", freight_cost=30, insurance_cost=10)
+    items = [
+        InvoiceLineItem(id=uuid.uuid4(), description="Shirts", quantity=10, unit_price=30, validated_hs_code="6109100010"),
+        InvoiceLineItem(id=uuid.uuid4(), description="More shirts", quantity=1, line_total=100, extracted_hs_code="6109100010"),
+        InvoiceLineItem(id=uuid.uuid4(), description="Unknown", quantity=1, line_total=0),
+    ]
+    result = await DutyCalculator(tariff).calculate(invoice, items, country_of_origin="TR")
+
+    assert tariff.calls == ["6109100010"]
+    assert result["complete"] is False
+    first, second, third = result["lines"]
+    assert first["customs_value"] == 330.0
+    assert first["duty"] == 14.85
+    assert first["preference_applied"] is True
+    assert first["vat"] == 68.97
+    assert second["customs_value"] == 110.0
+    assert third["error"] == "hs code missing"
+    assert result["totals"] == {"customs_value": 440.0, "duty": 19.8, "vat": 91.96}
+
+
+@pytest.mark.asyncio
+async def test_duty_requires_freight_for_non_cif_incoterms():
+    invoice = Invoice(id=uuid.uuid4(), currency="GBP", incoterm="EXW")
+    with pytest.raises(ValueError):
+        await DutyCalculator(StubTariffClient()).calculate(invoice, [])
+
+
+@pytest.mark.asyncio
+async def test_duty_without_origin_uses_third_country_rate():
+    invoice = Invoice(id=uuid.uuid4(), currency="GBP", incoterm="CIF")
+    items = [InvoiceLineItem(id=uuid.uuid4(), description="Shirts", quantity=1, line_total=100, validated_hs_code="6109100010")]
+
+    result = await DutyCalculator(StubTariffClient()).calculate(invoice, items)
+
+    line = result["lines"][0]
+    assert line["duty_rate"] == 12.0
+    assert line["preference_applied"] is False
+    assert line["duty"] == 12.0
+
+
+@pytest.mark.asyncio
+async def test_unused_specific_preference_does_not_block_ad_valorem_duty():
+    commodity = {
+        "data": COMMODITY["data"],
+        "included": [
+            item
+            for item in COMMODITY["included"]
+            if item.get("id") != "142-1"
+        ]
+        + [{"type": "duty_expression", "id": "142-1", "attributes": {"base": "3.50 GBP / 100 kg"}}],
+    }
+    invoice = Invoice(id=uuid.uuid4(), currency="GBP", incoterm="CIF")
+    items = [InvoiceLineItem(id=uuid.uuid4(), description="Shirts", quantity=1, line_total=100, validated_hs_code="6109100010")]
+
+    result = await DutyCalculator(StubTariffClient(commodity)).calculate(invoice, items, country_of_origin="TR")
+
+    line = result["lines"][0]
+    assert "error" not in line
+    assert line["duty_rate"] == 12.0
+    assert line["preference_applied"] is False
@@ -0,0 +1,247 @@
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from app.api.deps import get_current_user
+from app.integrations.fx import FXClient, FXRateStore
+from app.models import User, Invoice, InvoiceLineItem
+from app.models.enums import PlanEnum, AccountTypeEnum, StatusEnum, AuthProviderEnum
+
+
+class StubFXClient(FXClient):
+    def __init__(self):
+        super().__init__("https://fx.test/latest")
+        self.calls = []
+
+    async def rates(self, base, on_date=None):
+        self.calls.append((base, on_date))
+        return {"base": base, "date": "2026-01-02", "rates": {"GBP": Decimal("0.7912"), "EUR": Decimal("0.9130")}}
+
+
+@pytest.mark.asyncio
+async def test_rate_store_converts_locally_from_one_daily_table():
+    client = StubFXClient()
+    store = FXRateStore(client)
+
+    first = await store.quote("usd", "gbp", 100)
+    assert first["rate"] == 0.7912
+    assert first["converted"] == 79.12
+    assert first["date"] == "2026-01-02"
+
+    zero = await store.quote("USD", "EUR", 0)
+    assert zero["rate"] == 0.913
+    assert zero["converted"] == 0
+
+    same = await store.quote("USD", "USD", 5)
+    assert same["rate"] == 1
+    assert client.calls == [("USD", None)]
+
+    with pytest.raises(ValueError):
+        await store.rate("USD", "JPY")
+
+
+class StubSeriesClient(StubFXClient):
+    async def series(self, base, start, end):
+        self.calls.append((base, start, end))
+        return {
+            "2025-12-31": {"GBP": Decimal("0.7400")},
+            "2026-01-02": {"GBP": Decimal("0.7500")},
+            "2026-01-05": {"GBP": Decimal("0.7600")},
+        }
+
+
+@pytest.mark.asyncio
+async def test_historical_rates_use_nearest_previous_business_day():
+    client = StubSeriesClient()
+    store = FXRateStore(client)
+    await store.backfill("USD", date(2026, 1, 1), date(2026, 1, 6))
+    assert len(client.calls) == 1
+
+    assert await store.rate_on("USD", "GBP", date(2026, 1, 2)) == (Decimal("0.7500"), "2026-01-02")
+    assert await store.rate_on("USD", "GBP", date(2026, 1, 4)) == (Decimal("0.7500"), "2026-01-02")
+    assert await store.rate_on("USD", "GBP", date(2026, 1, 1)) == (Decimal("0.7400"), "2025-12-31")
+    assert await store.rate_on("USD", "GBP", date(2026, 1, 6)) == (Decimal("0.7600"), "2026-01-05")
+    assert len(client.calls) == 1
+
+    with pytest.raises(ValueError):
+        await store.rate_on("USD", "GBP", date(2025, 6, 1))
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_lookup_before_first_stored_rate_does_not_use_a_later_rate():
+    store = FXRateStore(StubSeriesClient())
+    await store.backfill("USD", date(2026, 1, 1), date(2026, 1, 6))
+
+    with pytest.raises(ValueError):
+        store.lookup("USD", "GBP", date(2025, 12, 30))
+    assert store.lookup("USD", "GBP", date(2025, 12, 31)) == (Decimal("0.7400"), "2025-12-31")
+
+
+@pytest.mark.asyncio
+async def test_bulk_normalization_uses_one_rate_lookup_per_group(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="bulk-fx@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoices = [
+        Invoice(user_id=user.id, currency=currency, invoice_date=invoice_date, total_value=total, source_upload_id=uuid.uuid4())
+        for currency, invoice_date, total in [
+            ("USD", "2026-01-02", 100),
+            ("USD", "2026-01-02", 200),
+            ("USD", "2026-01-04", 10),
+            ("GBP", "2026-01-02", 50),
+        ]
+    ]
+    db_session.add_all([user, *invoices])
+    await db_session.commit()
+
+    stub = StubSeriesClient()
+    monkeypatch.setattr(invoices_endpoint, "fx_rates", FXRateStore(stub))
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/invoices/normalize-currency", json={"target_currency": "GBP"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert resp.status_code == 200
+    assert resp.headers["x-fx-rate-groups"] == "3"
+    lines = {line["invoice_id"]: line for line in map(json.loads, resp.text.splitlines())}
+    assert [lines[str(invoice.id)]["normalized_totals"]["total_value"] for invoice in invoices] == [75.0, 150.0, 7.5, 50.0]
+    assert lines[str(invoices[2].id)]["fx_rate_date"] == "2026-01-02"
+    assert len(stub.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_normalization_persists_and_skips_unchanged(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="persist-fx@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", invoice_date="2026-01-02", total_value=100, source_upload_id=uuid.uuid4())
+    line = InvoiceLineItem(invoice_id=invoice.id, description="Item", quantity=1, line_total=100, sort_order=0)
+    db_session.add_all([user, invoice, line])
+    await db_session.commit()
+
+    monkeypatch.setattr(invoices_endpoint, "fx_rates", FXRateStore(StubSeriesClient()))
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    body = {"target_currency": "GBP", "persist": True}
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        first = await ac.post("/api/v1/invoices/normalize-currency", json=body)
+        second = await ac.post("/api/v1/invoices/normalize-currency", json=body)
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert first.json()["updated"] == 1
+    assert second.json() == {"target_currency": "GBP", "groups": 1, "updated": 0, "unchanged": 1, "failed": 0}
+    stored = await db_session.get(Invoice, invoice.id)
+    assert stored.normalized_currency == "GBP"
+    assert Decimal(str(stored.normalized_total_value)) == Decimal("75")
+    assert stored.normalization_rate_date == "2026-01-02"
+
+
+class FlakySeriesClient(StubSeriesClient):
+    async def series(self, base, start, end):
+        if base == "EUR":
+            raise httpx.ConnectTimeout("timed out")
+        return await super().series(base, start, end)
+
+
+@pytest.mark.asyncio
+async def test_bulk_normalization_reports_failed_currency_per_invoice(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="flaky-fx@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    usd = Invoice(user_id=user.id, currency="USD", invoice_date="2026-01-02", total_value=100, source_upload_id=uuid.uuid4())
+    eur = Invoice(user_id=user.id, currency="EUR", invoice_date="2026-01-02", total_value=100, source_upload_id=uuid.uuid4())
+    db_session.add_all([user, usd, eur])
+    await db_session.commit()
+
+    monkeypatch.setattr(invoices_endpoint, "fx_rates", FXRateStore(FlakySeriesClient()))
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/invoices/normalize-currency", json={"target_currency": "GBP"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert resp.status_code == 200
+    lines = {line["invoice_id"]: line for line in map(json.loads, resp.text.splitlines())}
+    assert lines[str(usd.id)]["normalized_totals"]["total_value"] == 75.0
+    assert lines[str(eur.id)]["error"] == "fx rate unavailable"
+
+
+def test_invoice_dates_parse_common_formats():
+    from app.services.invoice_validation_service import invoice_fx_date, parse_invoice_date
+
+    for value in ("2026-01-10", "2026-01-10T09:00:00", "10/01/2026", "10.01.2026", "10 Jan 2026", "Jan 10, 2026", "January 10 2026"):
+        assert parse_invoice_date(value) == date(2026, 1, 10), value
+    assert invoice_fx_date(None) is None
+    with pytest.raises(ValueError):
+        invoice_fx_date("early January")
+
+
+@pytest.mark.asyncio
+async def test_unparseable_invoice_date_is_not_converted_at_latest_rate(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="unparseable-fx@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(user_id=user.id, currency="USD", invoice_date="early January", total_value=100, source_upload_id=uuid.uuid4())
+    db_session.add_all([user, invoice])
+    await db_session.commit()
+
+    stub = StubSeriesClient()
+    monkeypatch.setattr(invoices_endpoint, "fx_rates", FXRateStore(stub))
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        single = await ac.post(f"/api/v1/invoices/{invoice.id}/normalize-currency", json={"target_currency": "GBP"})
+        bulk = await ac.post("/api/v1/invoices/normalize-currency", json={"target_currency": "GBP"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert single.status_code == 400
+    assert single.json()["detail"] == "invoice_date unparseable"
+    assert json.loads(bulk.text.splitlines()[0])["error"] == "invoice_date unparseable"
+    assert stub.calls == []
@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.deps import get_current_user
+from app.models import User
+from app.models.enums import PlanEnum, AccountTypeEnum, StatusEnum, AuthProviderEnum
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_and_admin_health_endpoint(client):
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.db.session import InstrumentedQueuePool, pool_stats
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=0)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert pool_stats(engine)["checked_out"] == 1
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    stats = pool_stats(engine)
+    await engine.dispose()
+    assert stats["checkouts"] == 2
+    assert stats["checked_out"] == 0
+    assert stats["timeouts"] == 0
+
+    def make_user(account_type):
+        return User(
+            id=uuid.uuid4(),
+            email=f"{account_type.value}-health@example.com",
+            plan=PlanEnum.pro,
+            account_type=account_type,
+            status=StatusEnum.active,
+            auth_provider=AuthProviderEnum.google,
+        )
+
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        client.dependency_overrides[get_current_user] = lambda: make_user(AccountTypeEnum.uk_exporter)
+        denied = await ac.get("/api/v1/health/db")
+        client.dependency_overrides[get_current_user] = lambda: make_user(AccountTypeEnum.admin)
+        allowed = await ac.get("/api/v1/health/db")
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()["pool"] == "InstrumentedQueuePool"
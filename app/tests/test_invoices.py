@@ -140,3 +140,783 @@ async def test_validate_creates_freight_task(client, db_session):
         assert data["status"] == "needs_user_input"
 
     client.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_rule_engine_single_pass_and_timings():
+    from app.services.invoice_validator import rules, validate_invoice_payload
+
+    payload = {
+        "currency": "USD",
+        "total_value": 10.0,
+        "line_items": [
+            {"description": "A", "quantity": -1, "unit_price": 5.0},
+            {"description": "B", "quantity": 1, "line_total": 2.0},
+        ],
+    }
+    assert validate_invoice_payload(payload) == [
+        "invoice_date required",
+        "line_items[0].quantity must be >= 0",
+        "total_value does not match sum of line totals",
+    ]
+    stats = {row["rule"]: row for row in rules.compile("confirm").stats()}
+    assert set(stats) == {"required_fields", "non_negative_quantity", "line_totals", "totals_reconciled"}
+    assert all(row["evaluations"] >= 1 for row in stats.values())
+
+    findings = rules.compile("tasks").evaluate({"incoterm": "fob", "freight_cost": 10}, [])
+    assert [finding["task_type"] for finding in findings] == ["FREIGHT_REQUIRED", "INSURANCE_REQUIRED"]
+    assert findings[0]["payload"]["need_insurance"] is True
+
+
+@pytest.mark.asyncio
+async def test_decimal_reconciliation_explains_rounding_policy():
+    from app.services.invoice_validator import reconcile
+
+    lines = [{"description": "Bolt", "quantity": 3, "unit_price": 0.335} for _ in range(2000)]
+    report = reconcile({"total_value": 2000.0, "line_items": lines})
+    assert report["ok"]
+    assert report["explanation"] == "total_value matches line totals with half-even rounding"
+
+    report = reconcile(
+        {
+            "total_value": 25.0,
+            "line_items": [
+                {"description": "A", "quantity": 3, "unit_price": 3.339, "line_total": 10.01},
+                {"description": "B", "quantity": 1, "unit_price": 5.0, "line_total": 5.0},
+            ],
+        }
+    )
+    assert not report["ok"]
+    assert report["difference"] == "9.99"
+    assert report["deviating_lines"] == [
+        {
+            "index": 0,
+            "line_total": "10.01",
+            "computed": "10.017",
+            "difference": "-0.007",
+            "explanation": "line_total matches quantity x unit_price with truncation rounding",
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_revalidation_only_rechecks_changed_lines(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="revalidate@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        incoterm="CIF",
+        currency="USD",
+        total_value=30.0,
+        freight_cost=1.0,
+        insurance_cost=1.0,
+        source_upload_id=uuid.uuid4(),
+    )
+    lines = [
+        InvoiceLineItem(id=uuid.uuid4(), invoice_id=invoice.id, description=f"Item {idx}", quantity=1, line_total=10.0, sort_order=idx)
+        for idx in range(3)
+    ]
+    db_session.add_all([user, invoice, *lines])
+    await db_session.commit()
+
+    searched = []
+
+    async def fake_search(query, limit=5):
+        searched.append(query)
+        return []
+
+    monkeypatch.setattr(invoices_endpoint.tariff_client, "search", fake_search)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        first = (await ac.post(f"/api/v1/invoices/{invoice.id}/validate")).json()
+        second = (await ac.post(f"/api/v1/invoices/{invoice.id}/validate")).json()
+        await ac.post(
+            f"/api/v1/invoices/{invoice.id}/line-items/{lines[1].id}/hs-code/resolve",
+            json={"selected_code": "6109100010"},
+        )
+        third = (await ac.post(f"/api/v1/invoices/{invoice.id}/validate")).json()
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert first["revalidated_lines"] == 3
+    assert len(first["tasks"]) == 3
+    assert second["revalidated_lines"] == 0
+    assert [task["id"] for task in second["tasks"]] == [task["id"] for task in first["tasks"]]
+    assert third["revalidated_lines"] == 1
+    assert len(third["tasks"]) == 2
+    assert searched == ["Item 0", "Item 1", "Item 2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_tariff_lookup_is_retried_on_next_validation(client, db_session, monkeypatch):
+    import httpx
+    from app.api.v1.endpoints import invoices as invoices_endpoint
+
+    user = User(
+        id=uuid.uuid4(),
+        email="revalidate-retry@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(
+        id=uuid.uuid4(), user_id=user.id, incoterm="CIF", currency="USD", insurance_cost=1.0, source_upload_id=uuid.uuid4()
+    )
+    line = InvoiceLineItem(id=uuid.uuid4(), invoice_id=invoice.id, description="Cotton shirts", quantity=1, sort_order=0)
+    db_session.add_all([user, invoice, line])
+    await db_session.commit()
+
+    outcomes = [httpx.ConnectTimeout("timed out"), [{"code": "6205200000", "description": "Shirts", "score": 1}]]
+
+    async def flaky_search(query, limit=5):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(invoices_endpoint.tariff_client, "search", flaky_search)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        first = (await ac.post(f"/api/v1/invoices/{invoice.id}/validate")).json()
+        second = (await ac.post(f"/api/v1/invoices/{invoice.id}/validate")).json()
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert first["tasks"][0]["payload_jsonb"]["search_suggestions"] == []
+    assert second["revalidated_lines"] == 1
+    assert second["tasks"][0]["id"] == first["tasks"][0]["id"]
+    assert second["tasks"][0]["payload_jsonb"]["search_suggestions"][0]["code"] == "6205200000"
+    assert outcomes == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_resolve_checks_ownership_and_updates_codes(client, db_session):
+    from app.models import ValidationTask
+
+    owner, other = [
+        User(
+            id=uuid.uuid4(),
+            email=email,
+            plan=PlanEnum.free,
+            account_type=AccountTypeEnum.free,
+            status=StatusEnum.active,
+            auth_provider=AuthProviderEnum.google,
+        )
+        for email in ("bulk-owner@example.com", "bulk-other@example.com")
+    ]
+    invoice = Invoice(id=uuid.uuid4(), user_id=owner.id, currency="USD", source_upload_id=uuid.uuid4())
+    foreign_invoice = Invoice(id=uuid.uuid4(), user_id=other.id, currency="USD", source_upload_id=uuid.uuid4())
+    lines = [
+        InvoiceLineItem(id=uuid.uuid4(), invoice_id=invoice.id, description=f"Item {idx}", quantity=1, sort_order=idx)
+        for idx in range(2)
+    ]
+    tasks = [
+        ValidationTask(id=uuid.uuid4(), invoice_id=invoice.id, user_id=owner.id, line_item_id=lines[0].id, task_type="HS_CODE_MISSING", status="OPEN"),
+        ValidationTask(id=uuid.uuid4(), invoice_id=invoice.id, user_id=owner.id, line_item_id=lines[1].id, task_type="HS_CODE_REFINEMENT", status="OPEN"),
+        ValidationTask(id=uuid.uuid4(), invoice_id=invoice.id, user_id=owner.id, task_type="INSURANCE_REQUIRED", status="OPEN"),
+    ]
+    foreign_task = ValidationTask(id=uuid.uuid4(), invoice_id=foreign_invoice.id, user_id=other.id, task_type="INSURANCE_REQUIRED", status="OPEN")
+    db_session.add_all([owner, other, invoice, foreign_invoice, *lines, *tasks, foreign_task])
+    await db_session.commit()
+
+    async def override_user():
+        return owner
+
+    resolutions = [
+        {"task_id": str(tasks[0].id), "resolution": {"selected_code": "6109100010"}},
+        {"task_id": str(tasks[1].id), "resolution": {"chosen_child_code": "6110209100"}},
+        {"task_id": str(tasks[2].id), "resolution": {"type": "estimate"}},
+    ]
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        denied = await ac.post(
+            "/api/v1/validation-tasks/resolve",
+            json={"resolutions": resolutions + [{"task_id": str(foreign_task.id), "resolution": {}}]},
+        )
+        resp = await ac.post("/api/v1/validation-tasks/resolve", json={"resolutions": resolutions})
+        replay = await ac.post(
+            "/api/v1/validation-tasks/resolve",
+            json={"resolutions": [{"task_id": str(tasks[0].id), "resolution": {"selected_code": "0101210000"}}]},
+        )
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert denied.status_code == 404
+    assert denied.json()["detail"]["task_ids"] == [str(foreign_task.id)]
+    assert resp.status_code == 200
+    assert resp.json()["hs_codes_updated"] == 2
+    assert {task["status"] for task in resp.json()["resolved"]} == {"RESOLVED"}
+    for line in lines:
+        await db_session.refresh(line)
+    assert [line.validated_hs_code for line in lines] == ["6109100010", "6110209100"]
+    assert replay.status_code == 409
+    assert replay.json()["detail"]["task_ids"] == [str(tasks[0].id)]
+
+
+@pytest.mark.asyncio
+async def test_refine_loads_invoice_line_and_task_in_one_query(client, db_session, engine):
+    from sqlalchemy import event
+    from app.models import ValidationTask
+
+    user = User(
+        id=uuid.uuid4(),
+        email="refine-loader@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", source_upload_id=uuid.uuid4())
+    line = InvoiceLineItem(id=uuid.uuid4(), invoice_id=invoice.id, description="Shirt", quantity=1, extracted_hs_code="6109", sort_order=0)
+    task = ValidationTask(id=uuid.uuid4(), invoice_id=invoice.id, user_id=user.id, line_item_id=line.id, task_type="HS_CODE_REFINEMENT", status="OPEN")
+    db_session.add_all([user, invoice, line, task])
+    await db_session.commit()
+
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    event.listen(engine.sync_engine, "before_cursor_execute", count_selects)
+    try:
+        async with AsyncClient(app=client, base_url="http://test") as ac:
+            resp = await ac.post(
+                f"/api/v1/invoices/{invoice.id}/line-items/{line.id}/hs-code/refine",
+                json={"chosen_child_code": "6109100010"},
+            )
+            missing = await ac.post(
+                f"/api/v1/invoices/{invoice.id}/line-items/{uuid.uuid4()}/hs-code/refine",
+                json={"chosen_child_code": "6109100010"},
+            )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_selects)
+        client.dependency_overrides.pop(get_current_user, None)
+
+    assert resp.status_code == 200
+    assert missing.json()["detail"] == "Line item not found"
+    assert len(selects) == 2
+    assert task.status == "RESOLVED"
+
+
+@pytest.mark.asyncio
+async def test_task_queue_keyset_pagination(client, db_session):
+    from datetime import datetime, timedelta
+    from app.models import ValidationTask
+
+    user = User(
+        id=uuid.uuid4(),
+        email="task-queue@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoices = [Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", source_upload_id=uuid.uuid4()) for _ in range(2)]
+    start = datetime(2026, 1, 1)
+    tasks = [
+        ValidationTask(
+            id=uuid.uuid4(),
+            invoice_id=invoices[idx % 2].id,
+            user_id=user.id,
+            task_type="HS_CODE_MISSING" if idx % 2 else "INSURANCE_REQUIRED",
+            status="RESOLVED" if idx == 4 else "OPEN",
+            created_at=start + timedelta(minutes=idx // 2),
+        )
+        for idx in range(6)
+    ]
+    db_session.add_all([user, *invoices, *tasks])
+    await db_session.commit()
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    seen = []
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        params = {"limit": 2}
+        while True:
+            page = (await ac.get("/api/v1/validation-tasks", params=params)).json()
+            seen.extend(task["id"] for task in page["items"])
+            if not page["next_cursor"]:
+                break
+            params["cursor"] = page["next_cursor"]
+        typed = (await ac.get("/api/v1/validation-tasks", params={"task_type": "hs_code_missing"})).json()
+        bad = await ac.get("/api/v1/validation-tasks", params={"cursor": "nope"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    expected = sorted((task for task in tasks if task.status == "OPEN"), key=lambda task: (task.created_at, str(task.id)))
+    assert seen == [str(task.id) for task in expected]
+    assert {task["task_type"] for task in typed["items"]} == {"HS_CODE_MISSING"}
+    assert len(typed["items"]) == 3
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invoice_listing_pages_by_cursor(client, db_session):
+    from datetime import datetime, timedelta
+
+    user = User(
+        id=uuid.uuid4(),
+        email="cursor-list@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    start = datetime(2026, 1, 1)
+    invoices = [
+        Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", source_upload_id=uuid.uuid4(), created_at=start + timedelta(hours=idx // 2))
+        for idx in range(5)
+    ]
+    db_session.add_all([user, *invoices])
+    await db_session.commit()
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    seen = []
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        first = (await ac.get("/api/v1/invoices", params={"limit": 2, "include_total": True})).json()
+        page = first
+        while True:
+            seen.extend(item["id"] for item in page["items"])
+            if not page["next_cursor"]:
+                break
+            page = (await ac.get("/api/v1/invoices", params={"limit": 2, "cursor": page["next_cursor"]})).json()
+    client.dependency_overrides.pop(get_current_user, None)
+
+    expected = sorted(invoices, key=lambda invoice: (invoice.created_at, str(invoice.id)), reverse=True)
+    assert seen == [str(invoice.id) for invoice in expected]
+    assert first["total"] == 5
+    assert page["total"] is None
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_unless_user_recently_wrote(client, db_session, monkeypatch):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db import session as sessions
+    from app.db.base import Base
+
+    replica = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with replica.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(sessions, "ReplicaSessionLocal", async_sessionmaker(bind=replica, expire_on_commit=False))
+
+    user = User(
+        id=uuid.uuid4(),
+        email="replica-reads@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    db_session.add(user)
+    await db_session.commit()
+    assert not sessions.read_your_writes.is_pinned(user.id)
+
+    db_session.info["user_id"] = user.id
+    db_session.add(Invoice(user_id=user.id, currency="USD", source_upload_id=uuid.uuid4()))
+    await db_session.commit()
+    db_session.info.pop("user_id")
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        pinned = (await ac.get("/api/v1/invoices")).json()
+        sessions.read_your_writes._pinned.pop(str(user.id))
+        replicated = (await ac.get("/api/v1/invoices")).json()
+    client.dependency_overrides.pop(get_current_user, None)
+    await replica.dispose()
+
+    assert len(pinned["items"]) == 1
+    assert replicated["items"] == []
+
+
+def test_read_your_writes_drops_expired_pins(monkeypatch):
+    from app.db import session as sessions
+
+    now = [100.0]
+    monkeypatch.setattr(sessions.time, "monotonic", lambda: now[0])
+    pins = sessions.ReadYourWrites(window_seconds=5)
+    for idx in range(3):
+        pins.pin(f"user-{idx}")
+    now[0] = 106.0
+    pins.pin("user-3")
+
+    assert list(pins._pinned) == ["user-3"]
+    assert pins.is_pinned("user-3")
+    assert not pins.is_pinned("user-0")
+
+
+@pytest.mark.asyncio
+async def test_invoice_detail_loads_items_in_one_query(client, db_session, engine):
+    from sqlalchemy import event
+
+    user = User(
+        id=uuid.uuid4(),
+        email="detail-query@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoice = Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", total_value=12.5, source_upload_id=uuid.uuid4())
+    empty = Invoice(id=uuid.uuid4(), user_id=user.id, currency="EUR", source_upload_id=uuid.uuid4())
+    lines = [
+        InvoiceLineItem(invoice_id=invoice.id, description=f"Item {idx}", quantity=idx + 1, line_total=2.5, sort_order=idx)
+        for idx in (2, 0, 1)
+    ]
+    db_session.add_all([user, invoice, empty, *lines])
+    await db_session.commit()
+
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    event.listen(engine.sync_engine, "before_cursor_execute", count_selects)
+    try:
+        async with AsyncClient(app=client, base_url="http://test") as ac:
+            resp = await ac.get(f"/api/v1/invoices/{invoice.id}")
+            empty_resp = await ac.get(f"/api/v1/invoices/{empty.id}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_selects)
+        client.dependency_overrides.pop(get_current_user, None)
+
+    data = resp.json()
+    assert len(selects) == 2
+    assert data["total_value"] == 12.5
+    assert [item["description"] for item in data["items"]] == ["Item 0", "Item 1", "Item 2"]
+    assert empty_resp.json()["items"] == []
+
+
+def test_fast_json_response_matches_default_encoding():
+    import json
+    from datetime import datetime
+    from decimal import Decimal
+    from fastapi.encoders import jsonable_encoder
+    from app.core import responses
+
+    content = {"id": uuid.uuid4(), "total": Decimal("12.50"), "created_at": datetime(2026, 1, 2, 3, 4, 5), "items": [None]}
+    expected = json.loads(json.dumps(jsonable_encoder(content)))
+    assert json.loads(responses.FastJSONResponse(content).body) == expected
+
+    fallback, responses.orjson = responses.orjson, None
+    try:
+        assert json.loads(responses.dumps(content)) == expected
+    finally:
+        responses.orjson = fallback
+
+
+@pytest.mark.asyncio
+async def test_draft_listing_returns_summary_unless_fields_requested(client, db_session):
+    user = User(
+        id=uuid.uuid4(),
+        email="draft-summary@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    upload = UploadedDocument(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        filename="summary.pdf",
+        content_type="application/pdf",
+        storage_path="/tmp/summary.pdf",
+        sha256="summary",
+        size_bytes=100,
+    )
+    draft = DraftInvoice(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        upload_id=upload.id,
+        status="READY_FOR_REVIEW",
+        confidence=0.9,
+        extracted_payload_json={"supplier_name": "Acme Ltd", "currency": "USD", "total_value": 42.5, "line_items": [{"description": "x" * 50}]},
+        raw_text_excerpt="raw text",
+    )
+    db_session.add_all([user, upload, draft])
+    await db_session.commit()
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        summary_resp = await ac.get("/api/v1/invoices/drafts")
+        summary = summary_resp.json()["items"][0]
+        detailed = (await ac.get("/api/v1/invoices/drafts", params={"fields": "extracted_payload,warnings"})).json()["items"][0]
+        bad = await ac.get("/api/v1/invoices/drafts", params={"fields": "password"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert summary["supplier_name"] == "Acme Ltd"
+    assert summary["currency"] == "USD"
+    assert summary["total_value"] == 42.5
+    assert not {"extracted_payload", "confirmed_payload", "warnings", "raw_text_excerpt"} & summary.keys()
+    assert detailed["extracted_payload"]["supplier_name"] == "Acme Ltd"
+    assert detailed["warnings"] == []
+    assert "raw_text_excerpt" not in detailed
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_invoice_listing_filters_and_search(client, db_session):
+    user = User(
+        id=uuid.uuid4(),
+        email="search-list@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    acme = Invoice(
+        id=uuid.uuid4(), user_id=user.id, supplier_name="Acme Widgets Ltd", invoice_number="INV-1001",
+        currency="USD", invoice_date="2026-01-10", total_value=500, source_upload_id=uuid.uuid4(),
+    )
+    globex = Invoice(
+        id=uuid.uuid4(), user_id=user.id, supplier_name="Globex 100% Cotton", invoice_number="GX_77",
+        currency="eur", invoice_date="20/02/2026", total_value=50, source_upload_id=uuid.uuid4(),
+    )
+    undated = Invoice(
+        id=uuid.uuid4(), user_id=user.id, supplier_name="Initech", currency="GBP", invoice_date="early January",
+        total_value=1000, source_upload_id=uuid.uuid4(),
+    )
+    lines = [
+        InvoiceLineItem(invoice_id=acme.id, description="Steel bolts", quantity=1, validated_hs_code="7318.15.00.00", sort_order=0),
+        InvoiceLineItem(invoice_id=globex.id, description="Cotton shirts", quantity=1, extracted_hs_code="6205 20 00 00", sort_order=0),
+    ]
+    db_session.add_all([user, acme, globex, undated, *lines])
+    await db_session.commit()
+    assert globex.currency == "EUR"
+    assert [line.validated_hs_code or line.extracted_hs_code for line in lines] == ["7318150000", "6205200000"]
+
+    async def override_user():
+        return user
+
+    async def ids(**params):
+        resp = await ac.get("/api/v1/invoices", params=params)
+        assert resp.status_code == 200, resp.text
+        return {item["id"] for item in resp.json()["items"]}
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        assert await ids(supplier="acme") == {str(acme.id)}
+        assert await ids(supplier="100%") == {str(globex.id)}
+        assert await ids(number="x_7") == {str(globex.id)}
+        assert await ids(currency="eur") == {str(globex.id)}
+        assert await ids(date_from="2026-02-01") == {str(globex.id)}
+        assert await ids(date_to="2026-01-31", min_total=100) == {str(acme.id)}
+        assert await ids(hs_code="7318.15") == {str(acme.id)}
+        assert await ids(hs_code="7318.15.00") == {str(acme.id)}
+        assert await ids(hs_code="6205") == {str(globex.id)}
+        assert await ids(q="shirt") == {str(globex.id)}
+        assert await ids(q="inv-10") == {str(acme.id)}
+        counted = (await ac.get("/api/v1/invoices", params={"currency": "USD", "include_total": True})).json()
+        bad = await ac.get("/api/v1/invoices", params={"hs_code": "abc"})
+        punctuation = [(await ac.get("/api/v1/invoices", params={"hs_code": code})).status_code for code in ("..", "  ", "7.")]
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert counted["total"] == 1
+    assert bad.status_code == 422
+    assert punctuation == [422, 422, 422]
+
+
+async def _stub_partitions(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _export_rows():
+    from app.services.invoice_export import EXPORT_COLUMNS
+
+    invoice_ids = [uuid.uuid4(), uuid.uuid4()]
+    rows = []
+    for invoice_id, item_count in zip(invoice_ids, (2, 0)):
+        for index in range(max(item_count, 1)):
+            row = dict.fromkeys(EXPORT_COLUMNS)
+            row.update(id=invoice_id, currency="USD")
+            if item_count:
+                row.update(item_id=uuid.uuid4(), item_description=f"Item {index}", item_sort_order=index)
+            rows.append(row)
+    return invoice_ids, rows
+
+
+@pytest.mark.asyncio
+async def test_export_streams_csv_and_ndjson_in_chunks(client, db_session, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.core.config import settings
+    from app.services import invoice_export
+
+    user = User(
+        id=uuid.uuid4(),
+        email="export@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoices = [
+        Invoice(id=uuid.uuid4(), user_id=user.id, supplier_name=f"Supplier {idx}", currency="USD", total_value=10 * idx, source_upload_id=uuid.uuid4())
+        for idx in range(3)
+    ]
+    lines = [
+        InvoiceLineItem(invoice_id=invoices[idx].id, description=f"Item {idx}-{pos}", quantity=1, sort_order=pos)
+        for idx, count in ((0, 2), (1, 3))
+        for pos in range(count)
+    ]
+    db_session.add_all([user, *invoices, *lines])
+    await db_session.commit()
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        csv_resp = await ac.get("/api/v1/invoices/export", params={"format": "csv"})
+        ndjson_resp = await ac.get("/api/v1/invoices/export", params={"format": "ndjson", "supplier": "Supplier 1"})
+        monkeypatch.setattr(invoice_export, "pyarrow", None)
+        parquet_resp = await ac.get("/api/v1/invoices/export", params={"format": "parquet"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    assert csv_resp.headers["content-disposition"] == 'attachment; filename="invoices.csv"'
+    records = list(csv.DictReader(io.StringIO(csv_resp.text)))
+    assert len(records) == 6
+    assert [record["item_description"] for record in records if record["id"] == str(invoices[1].id)] == ["Item 1-0", "Item 1-1", "Item 1-2"]
+    assert [record["item_id"] for record in records if record["id"] == str(invoices[2].id)] == [""]
+
+    exported = [json.loads(line) for line in ndjson_resp.text.splitlines()]
+    assert [invoice["id"] for invoice in exported] == [str(invoices[1].id)]
+    assert [item["description"] for item in exported[0]["items"]] == ["Item 1-0", "Item 1-1", "Item 1-2"]
+    assert parquet_resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_groups_rows_across_partitions():
+    import json
+    from app.services.invoice_export import ndjson_chunks
+
+    invoice_ids, rows = _export_rows()
+    chunks = [chunk async for chunk in ndjson_chunks(_stub_partitions(rows, 1))]
+    exported = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [invoice["id"] for invoice in exported] == [str(invoice_id) for invoice_id in invoice_ids]
+    assert [item["description"] for item in exported[0]["items"]] == ["Item 0", "Item 1"]
+    assert exported[1]["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_round_trips_model_precision(client, db_session, monkeypatch):
+    import io
+    from decimal import Decimal
+    import pyarrow.parquet as parquet
+    from app.core.config import settings
+
+    user = User(
+        id=uuid.uuid4(),
+        email="export-parquet@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    invoices = [
+        Invoice(id=uuid.uuid4(), user_id=user.id, currency="USD", total_value=12.5, source_upload_id=uuid.uuid4()) for _ in range(2)
+    ]
+    lines = [
+        InvoiceLineItem(
+            invoice_id=invoices[0].id, description=f"Item {pos}", quantity=2, unit_price=1.25, line_total=2.5, hs_confidence=0.9, sort_order=pos
+        )
+        for pos in range(2)
+    ]
+    db_session.add_all([user, *invoices, *lines])
+    await db_session.commit()
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 1)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/invoices/export", params={"format": "parquet"})
+    client.dependency_overrides.pop(get_current_user, None)
+
+    table = parquet.read_table(io.BytesIO(resp.content))
+    assert table.num_rows == 3
+    first = table.to_pylist()[0]
+    assert first["total_value"] == Decimal("12.500000")
+    assert first["item_unit_price"] == Decimal("1.25")
+    assert first["item_hs_confidence"] == Decimal("0.900")
+
+
+@pytest.mark.asyncio
+async def test_export_writer_failures_are_reported(client, db_session, monkeypatch, caplog):
+    from app.services import invoice_export
+
+    user = User(
+        id=uuid.uuid4(),
+        email="export-failure@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    db_session.add_all([user, Invoice(user_id=user.id, currency="USD", source_upload_id=uuid.uuid4())])
+    await db_session.commit()
+
+    async def broken_writer(partitions):
+        async for _ in partitions:
+            raise ValueError("value exceeds column precision")
+        yield b""
+
+    monkeypatch.setitem(invoice_export.EXPORT_WRITERS, "ndjson", broken_writer)
+
+    async def override_user():
+        return user
+
+    client.dependency_overrides[get_current_user] = override_user
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/invoices/export", params={"format": "ndjson"})
+    client.dependency_overrides.pop(get_current_user, None)
+    assert resp.status_code == 500
+
+    async def fails_after_first_chunk(partitions):
+        yield b"{}\n"
+        raise ValueError("value exceeds column precision")
+
+    monkeypatch.setitem(invoice_export.EXPORT_WRITERS, "ndjson", fails_after_first_chunk)
+    chunks = await invoice_export.start_export("ndjson", _stub_partitions([], 1))
+    with pytest.raises(ValueError):
+        async for _ in chunks:
+            pass
+    assert "Invoice export failed mid-stream" in caplog.text
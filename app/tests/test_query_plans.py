@@ -0,0 +1,76 @@
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import sqlite
+
+from app.core.pagination import apply_keyset, encode_cursor
+from app.db.base import Base
+from app.models import DraftInvoice, Invoice, InvoiceLineItem, TeamMembership, ValidationTask
+
+MIGRATIONS = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+
+def _hot_queries():
+    user_id, invoice_id = uuid.uuid4(), uuid.uuid4()
+    cursor = encode_cursor(datetime(2026, 1, 1), uuid.uuid4())
+    return [
+        (
+            "ix_invoices_user_created",
+            apply_keyset(select(Invoice).where(Invoice.user_id == user_id), Invoice.created_at, Invoice.id, cursor, 20, descending=True),
+        ),
+        (
+            "ix_invoices_user_currency_created",
+            apply_keyset(
+                select(Invoice).where(Invoice.user_id == user_id, Invoice.currency == "USD"), Invoice.created_at, Invoice.id, None, 20, descending=True
+            ),
+        ),
+        (
+            "ix_draft_invoices_user_created",
+            apply_keyset(
+                select(DraftInvoice).where(DraftInvoice.user_id == user_id), DraftInvoice.created_at, DraftInvoice.id, None, 20, descending=True
+            ),
+        ),
+        (
+            "ix_invoice_line_items_invoice_sort",
+            select(InvoiceLineItem).where(InvoiceLineItem.invoice_id == invoice_id).order_by(InvoiceLineItem.sort_order),
+        ),
+        (
+            "ix_validation_tasks_invoice_status_created",
+            select(ValidationTask)
+            .where(ValidationTask.invoice_id == invoice_id, ValidationTask.status == "OPEN")
+            .order_by(ValidationTask.created_at.asc()),
+        ),
+        (
+            "ix_validation_tasks_user_status_created",
+            apply_keyset(
+                select(ValidationTask).where(ValidationTask.user_id == user_id, ValidationTask.status == "OPEN"),
+                ValidationTask.created_at,
+                ValidationTask.id,
+                cursor,
+                50,
+            ),
+        ),
+        ("ix_team_memberships_user_id", select(TeamMembership).where(TeamMembership.user_id == user_id)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes(engine):
+    async with engine.connect() as conn:
+        for index_name, stmt in _hot_queries():
+            sql = str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = " | ".join(row[-1] for row in (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all())
+            assert f"INDEX {index_name}" in plan, plan
+            assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+def test_model_indexes_have_migrations():
+    migrated = set()
+    for path in MIGRATIONS.glob("*.py"):
+        migrated.update(re.findall(r'create_index\(\s*"(\w+)"', path.read_text()))
+    declared = {index.name for table in Base.metadata.tables.values() for index in table.indexes if index.name}
+    assert declared <= migrated, declared - migrated
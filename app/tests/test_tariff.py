@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+import httpx
+from httpx import AsyncClient
+import pytest
+from sqlalchemy import delete
+
+from app.integrations.tariff import TariffClient
+from app.integrations.hs_trie import HSCodeTrie
+from app.integrations.tariff_index import CommoditySearchIndex
+from app.integrations.tariff_mirror import TariffMirror
+from app.models import TariffCommodity
+from app.services.tariff_sync import TariffSyncService
+
+UPSTREAM = {
+    "/chapters": {
+        "data": [
+            {"type": "chapter", "attributes": {"goods_nomenclature_sid": 1, "goods_nomenclature_item_id": "0100000000", "description": "LIVE ANIMALS"}},
+        ]
+    },
+    "/chapters/01": {
+        "data": {"type": "chapter", "attributes": {"goods_nomenclature_sid": 1}},
+        "included": [
+            {"type": "heading", "attributes": {"goods_nomenclature_sid": 10, "goods_nomenclature_item_id": "0101000000", "description": "Live horses, asses, mules and hinnies"}},
+        ],
+    },
+    "/headings/0101": {
+        "data": {"type": "heading", "attributes": {"goods_nomenclature_sid": 10, "goods_nomenclature_item_id": "0101000000", "description": "Live horses, asses, mules and hinnies"}},
+        "included": [
+            {"type": "commodity", "attributes": {"goods_nomenclature_sid": 11, "goods_nomenclature_item_id": "0101210000", "producline_suffix": "10", "description": "Horses", "number_indents": 1, "leaf": False}},
+            {"type": "commodity", "attributes": {"goods_nomenclature_sid": 12, "goods_nomenclature_item_id": "0101210000", "producline_suffix": "80", "description": "Pure-bred breeding animals", "number_indents": 2, "leaf": True}},
+            {"type": "commodity", "attributes": {"goods_nomenclature_sid": 13, "goods_nomenclature_item_id": "0101290000", "producline_suffix": "80", "description": "Other horses", "number_indents": 2, "leaf": True}},
+            {"type": "commodity", "attributes": {"goods_nomenclature_sid": 14, "goods_nomenclature_item_id": "0101300000", "producline_suffix": "80", "description": "Asses", "number_indents": 1, "leaf": True}},
+        ],
+    },
+}
+
+
+def _upstream_transport(calls: list[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/api/v2")
+        calls.append(path)
+        return httpx.Response(200, json=UPSTREAM[path])
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_sync_and_offline_lookups(db_session):
+    calls: list[str] = []
+    service = TariffSyncService(db_session, "https://tariff.test/api/v2", transport=_upstream_transport(calls))
+    stats = await service.sync()
+    assert stats["headings"] == 1
+    assert stats["commodities"] == 4
+
+    mirror = TariffMirror()
+    assert await mirror.load(db_session) == 6
+    client = TariffClient("https://tariff.test/api/v2", mirror=mirror)
+
+    children = await client.children("0101")
+    assert [c["attributes"]["goods_nomenclature_sid"] for c in children] == [11, 14]
+    grandchildren = await client.children("0101210000")
+    assert [c["attributes"]["goods_nomenclature_item_id"] for c in grandchildren] == ["0101210000", "0101290000"]
+
+    assert [c["code"] for c in client.candidate_codes("0101")] == ["0101210000", "0101290000", "0101300000"]
+
+    results = await client.search("pure-bred breeding animals", limit=5)
+    assert results[0]["code"] == "0101210000"
+
+    calls.clear()
+    stats = await service.sync(stale_after=timedelta(hours=1))
+    assert stats["skipped_chapters"] == 1
+    assert calls == ["/chapters"]
+    assert await mirror.refresh(db_session) is False
+
+    await db_session.execute(delete(TariffCommodity))
+    await db_session.commit()
+
+
+def test_search_index_ranks_and_tolerates_typos():
+    index = CommoditySearchIndex()
+    index.build(
+        [
+            ("6109100010", "T-shirts, singlets and other vests, of cotton, knitted or crocheted"),
+            ("6205200000", "Men's or boys' shirts of cotton"),
+            ("8471300000", "Portable automatic data-processing machines, weighing not more than 10 kg"),
+            ("0101210000", "Pure-bred breeding horses"),
+        ]
+    )
+    assert index.search("cotton t-shirts", limit=1)[0][0] == "6109100010"
+    assert index.search("laptop portable computer", limit=1)[0][0] == "8471300000"
+    assert index.search("cottn shrts", limit=2)[0][0] in {"6109100010", "6205200000"}
+    assert index.search("zzzz") == []
+
+
+def test_hs_code_trie_navigation(tmp_path):
+    trie = HSCodeTrie.build(
+        [
+            ("0100000000", False),
+            ("0101000000", False),
+            ("0101210000", True),
+            ("0101290000", True),
+            ("0101300000", False),
+            ("0101301000", True),
+            ("0101309010", True),
+        ]
+    )
+    path = str(tmp_path / "hs.trie")
+    trie.save(path)
+    for candidate in (trie, HSCodeTrie.load(path)):
+        assert candidate.children("01") == ["0101000000"]
+        assert candidate.children("0101") == ["0101210000", "0101290000", "0101300000"]
+        assert candidate.children("010130") == ["0101301000", "0101309010"]
+        assert candidate.descendants("0101300000") == ["0101301000", "0101309010"]
+        assert candidate.is_valid("0101290000")
+        assert not candidate.is_valid("0101220000")
+        assert not candidate.is_valid("01013090")
+        assert candidate.is_leaf("0101210000")
+        assert not candidate.is_leaf("0101300000")
+        assert len(candidate) == 7
+
+
+@pytest.mark.asyncio
+async def test_batch_search_dedupes_and_uses_cache(client, monkeypatch):
+    from app.api.v1.endpoints import tariff as tariff_endpoint
+
+    fetched: list[str] = []
+
+    async def fake_fetch(http_client, query, limit):
+        fetched.append(query)
+        if query == "broken":
+            raise httpx.HTTPError("boom")
+        results = [{"code": "6109100010", "description": query, "score": 1.0}]
+        tariff_endpoint.client._set_cache(f"search:{query}:{limit}", results)
+        return results
+
+    monkeypatch.setattr(tariff_endpoint.client, "_fetch_search", fake_fetch)
+    tariff_endpoint.client._set_cache("search:cached shirt:5", [{"code": "6205200000", "description": "cached", "score": 1.0}])
+
+    body = {"queries": ["cotton t-shirt", "cotton t-shirt", "cached shirt", "broken"], "limit": 5}
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/tariff/search/batch", json=body)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert sorted(fetched) == ["broken", "cotton t-shirt"]
+    assert set(data["results"]) == {"cotton t-shirt", "cached shirt"}
+    assert data["results"]["cached shirt"][0]["code"] == "6205200000"
+    assert data["errors"] == {"broken": "upstream search failed"}
@@ -117,3 +117,87 @@ async def test_forwarder_invite_accept(client, db_session):
     user = result.scalar_one()
     assert user.account_type == AccountTypeEnum.forwarder
     assert user.plan == PlanEnum.pro
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_skips_user_query(engine, db_session):
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.core.principal_cache import principal_cache
+    from app.core.security import create_access_token
+
+    user = User(
+        id=uuid.uuid4(),
+        email="principal-cache@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    db_session.add(user)
+    await db_session.commit()
+    token = create_access_token(str(user.id))
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_selects)
+    try:
+        async with session_maker() as session:
+            await get_current_user(token, session)
+        async with session_maker() as session:
+            cached = await get_current_user(token, session)
+            assert cached.email == "principal-cache@example.com"
+            cached.plan = PlanEnum.pro
+            await session.commit()
+        assert len(selects) == 1
+
+        principal_cache.invalidate(user.id)
+        async with session_maker() as session:
+            fresh = await get_current_user(token, session)
+        assert fresh.plan == PlanEnum.pro
+        assert len(selects) == 2
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_selects)
+        principal_cache.invalidate(user.id)
+
+
+@pytest.mark.asyncio
+async def test_oauth_login_invalidates_cached_principal(client, db_session, monkeypatch):
+    from app.api.v1.endpoints import auth as auth_endpoint
+    from app.core.principal_cache import principal_cache
+
+    user = User(
+        id=uuid.uuid4(),
+        email="login-cache@example.com",
+        plan=PlanEnum.free,
+        account_type=AccountTypeEnum.free,
+        status=StatusEnum.active,
+        auth_provider=AuthProviderEnum.google,
+    )
+    db_session.add(user)
+    await db_session.commit()
+    principal_cache.put(str(user.id), user)
+
+    async def consume_state(db, provider, raw_state):
+        return None
+
+    async def exchange_code(code):
+        return {"access_token": "provider-token"}
+
+    async def fetch_userinfo(token):
+        return {"mail": user.email}
+
+    monkeypatch.setattr(auth_endpoint, "consume_oauth_state", consume_state)
+    monkeypatch.setattr(auth_endpoint.microsoft_oauth, "exchange_code", exchange_code)
+    monkeypatch.setattr(auth_endpoint.microsoft_oauth, "fetch_userinfo", fetch_userinfo)
+    monkeypatch.setattr(auth_endpoint.settings, "FRONTEND_URL", "")
+    async with AsyncClient(app=client, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/auth/microsoft/callback", params={"code": "code", "state": "state"})
+
+    assert resp.status_code == 200
+    assert principal_cache.get(str(user.id)) is None
@@ -1,4 +1,5 @@
 
+import asyncio
 import logging
 import uuid
 from fastapi import FastAPI, Request
@@ -8,7 +9,8 @@ from starlette.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import engine, SessionLocal
+from app.integrations.tariff_mirror import tariff_mirror
 
 logging.basicConfig(level=logging.INFO)
 
@@ -42,6 +44,12 @@ async def startup_event() -> None:
     if settings.AUTO_CREATE_TABLES:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+    if settings.TARIFF_MIRROR_ENABLED:
+        async with SessionLocal() as db:
+            await tariff_mirror.load(db)
+        app.state.tariff_mirror_refresh = asyncio.create_task(
+            tariff_mirror.refresh_periodically(SessionLocal, settings.TARIFF_MIRROR_REFRESH_SECONDS)
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+"""Compare the old and projected serialization paths for a 100-item invoice page.
+
+    python scripts/bench_list_serialization.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import FastJSONResponse, orjson
+from app.schemas.invoice import InvoiceOut, ListResponse
+
+
+def make_rows(count: int) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "supplier_name": f"Supplier {idx}",
+            "invoice_number": f"INV-{idx:06d}",
+            "invoice_date": "2026-01-01",
+            "due_date": "2026-02-01",
+            "incoterm": "FOB",
+            "currency": "USD",
+            "total_value": Decimal("1234.560000"),
+            "freight_cost": Decimal("45.000000"),
+            "insurance_cost": None,
+            "created_at": start + timedelta(minutes=idx),
+        }
+        for idx in range(count)
+    ]
+
+
+def pydantic_path(rows: list[dict]) -> bytes:
+    items = [
+        InvoiceOut(
+            **{
+                **row,
+                "total_value": float(row["total_value"]) if row["total_value"] is not None else None,
+                "freight_cost": float(row["freight_cost"]) if row["freight_cost"] is not None else None,
+                "insurance_cost": float(row["insurance_cost"]) if row["insurance_cost"] is not None else None,
+            },
+            items=[],
+        )
+        for row in rows
+    ]
+    page = ListResponse(items=items, total=None, limit=len(rows), offset=0)
+    validated = ListResponse.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode("utf-8")
+
+
+def projected_path(rows: list[dict]) -> bytes:
+    items = [{**row, "items": []} for row in rows]
+    return FastJSONResponse({"items": items, "total": None, "limit": len(rows), "offset": 0, "next_cursor": None}).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(pydantic_path(rows))["items"][0]["total_value"] == json.loads(projected_path(rows))["items"][0]["total_value"]
+    baseline = min(timeit.repeat(lambda: pydantic_path(rows), number=args.repeat, repeat=5)) / args.repeat
+    fast = min(timeit.repeat(lambda: projected_path(rows), number=args.repeat, repeat=5)) / args.repeat
+    print(f"encoder: {'orjson' if orjson is not None else 'json'}")
+    print(f"pydantic + jsonable_encoder: {baseline * 1000:.3f} ms/page")
+    print(f"projected rows + FastJSONResponse: {fast * 1000:.3f} ms/page")
+    print(f"speed-up: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()